@@ -2,19 +2,23 @@
 prompt-vcs: Git-native prompt management library for LLM applications.
 """
 
-from prompt_vcs.api import p, prompt
-from prompt_vcs.manager import PromptManager, get_manager
-from prompt_vcs.validator import PromptValidator, ValidationRule, ValidationType
-from prompt_vcs.testing import TestCase, TestSuite, PromptTestRunner
-from prompt_vcs.codemod import migrate_file_content
-from prompt_vcs.ab_testing import (
-    ab_test,
-    ABTestManager,
-    ABTestConfig,
-    ABTestVariant,
-    ABTestRecord,
-    ABTestResult,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from prompt_vcs.api import p, prompt
+    from prompt_vcs.manager import PromptManager, get_manager
+    from prompt_vcs.validator import PromptValidator, ValidationRule, ValidationType
+    from prompt_vcs.testing import TestCase, TestSuite, PromptTestRunner
+    from prompt_vcs.codemod import migrate_file_content
+    from prompt_vcs.ab_testing import (
+        ab_test,
+        ABTestManager,
+        ABTestConfig,
+        ABTestVariant,
+        ABTestRecord,
+        ABTestResult,
+    )
 
 __version__ = "0.5.1"
 __all__ = [
@@ -37,3 +41,38 @@ __all__ = [
     "ABTestRecord",
     "ABTestResult",
 ]
+
+# Public names are imported on first access so that importing a submodule
+# (e.g. the CLI) does not pull in libcst, Jinja2 and friends up front.
+_LAZY_ATTRS = {
+    "p": "prompt_vcs.api",
+    "prompt": "prompt_vcs.api",
+    "PromptManager": "prompt_vcs.manager",
+    "get_manager": "prompt_vcs.manager",
+    "PromptValidator": "prompt_vcs.validator",
+    "ValidationRule": "prompt_vcs.validator",
+    "ValidationType": "prompt_vcs.validator",
+    "TestCase": "prompt_vcs.testing",
+    "TestSuite": "prompt_vcs.testing",
+    "PromptTestRunner": "prompt_vcs.testing",
+    "migrate_file_content": "prompt_vcs.codemod",
+    "ab_test": "prompt_vcs.ab_testing",
+    "ABTestManager": "prompt_vcs.ab_testing",
+    "ABTestConfig": "prompt_vcs.ab_testing",
+    "ABTestVariant": "prompt_vcs.ab_testing",
+    "ABTestRecord": "prompt_vcs.ab_testing",
+    "ABTestResult": "prompt_vcs.ab_testing",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -2,29 +2,110 @@
 CLI tool for prompt-vcs (pvcs).
 """
 
-import json
+import functools
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
-from prompt_vcs.extractor import (
-    extract_prompts_from_directory,
-    check_id_conflicts,
-    PromptIdConflictError,
+from prompt_vcs.manager import (
+    LOCKFILE_NAME,
+    PROMPTS_DIR,
+    PROMPTS_FILE,
+    ProjectInfo,
+    find_project,
+    inspect_project,
+    read_lockfile,
+    write_lockfile,
 )
-from prompt_vcs.manager import LOCKFILE_NAME, PROMPTS_DIR, PROMPTS_FILE
-from prompt_vcs.templates import save_yaml_template, save_prompts_file, load_prompts_file
+from prompt_vcs.templates import load_prompts_file
+
+if TYPE_CHECKING:
+    from pygments.lexer import Lexer
+    from rich.console import Console
+
+    from prompt_vcs.codemod import MigrationPlan
 
 
 app = typer.Typer(
     name="pvcs",
     help="Git-native prompt management CLI",
     add_completion=False,
+    no_args_is_help=True,
+)
+
+# Shared by every command taking --project; built once rather than per command
+_PROJECT_OPTION = typer.Option(
+    None,
+    "--project", "-p",
+    help="Project root directory",
 )
-console = Console()
+
+
+@functools.cache
+def _console() -> "Console":
+    """
+    Return the shared Rich console, importing Rich on first use.
+    
+    Auto-highlighting is only enabled for interactive terminals, and colour
+    is turned off entirely when running under CI.
+    """
+    from rich.console import Console
+    
+    return Console(
+        highlight=sys.stdout.isatty(),
+        emoji=False,
+        no_color=bool(os.environ.get("CI")),
+    )
+
+
+@functools.cache
+def _syntax_lexer(name: str) -> "Lexer":
+    """
+    Return a Pygments lexer for Rich Syntax panels, created once per session.
+    
+    Rich resolves a lexer given by name on every render; passing a shared
+    instance skips the repeated lookup and lexer construction.
+    """
+    from pygments.lexers import get_lexer_by_name
+    
+    return get_lexer_by_name(name, stripnl=False, ensurenl=True, tabsize=4)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_prompts_snapshot(path: str, mtime_ns: int, size: int) -> dict[str, dict]:
+    return load_prompts_file(Path(path))
+
+
+def _load_prompts_file_cached(path: Path) -> dict[str, dict]:
+    """
+    Load a prompts.yaml file, reusing the parse while the file is unchanged.
+    
+    Results are keyed on (path, mtime, size), so writes made by `migrate`
+    invalidate them. The returned dictionary is shared and must not be mutated.
+    """
+    st = os.stat(path)
+    return _load_prompts_snapshot(os.fspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _find_project_for(
+    project_dir: Optional[Path],
+    markers: tuple[str, ...] = (LOCKFILE_NAME, ".git"),
+) -> Optional[ProjectInfo]:
+    """
+    Resolve the project for a command's ``--project`` option.
+    
+    An explicit directory is inspected as-is; otherwise the nearest project
+    above the current directory is located.
+    """
+    if project_dir:
+        return inspect_project(project_dir.resolve())
+    return find_project(Path.cwd(), markers)
 
 
 def _single_file_version_exists(prompts_cache: dict[str, dict], prompt_id: str, version: str) -> bool:
@@ -66,6 +147,139 @@ def _single_file_version_template(
     return None
 
 
+def _yaml_versions(prompt_dir: Path) -> list[str]:
+    """
+    List the versions (``*.yaml`` file stems) in a prompt directory.
+    
+    Uses a single os.scandir pass, whose entries carry cached file types,
+    instead of globbing into Path objects.
+    
+    Raises:
+        FileNotFoundError: If the directory doesn't exist
+    """
+    with os.scandir(prompt_dir) as entries:
+        return sorted(
+            entry.name[:-5]
+            for entry in entries
+            if entry.name.endswith(".yaml") and entry.is_file()
+        )
+
+
+def _scan_python_file(
+    py_file: Path,
+    clean: bool,
+    project_root: Optional[Path],
+    extra_patterns: Optional[list[str]],
+) -> tuple[Path, Optional["MigrationPlan"], Optional[str]]:
+    """
+    Read a Python file and plan its migration without applying it.
+    
+    Runs in worker processes during `migrate`, so it must stay a module-level
+    function and only return picklable values.
+    
+    Returns:
+        Tuple of (path, plan, read_error). plan is None when the file has no candidates.
+    """
+    from prompt_vcs.codemod import plan_file_migration
+    
+    try:
+        raw = py_file.read_bytes()
+    except Exception as e:
+        return py_file, None, str(e)
+    
+    try:
+        content = raw.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return py_file, None, str(e)
+    
+    # plan_file_migration skips the libcst parse itself when no name in the
+    # file can match a pattern, using the codemod's own case-insensitive rules
+    plan = plan_file_migration(
+        content,
+        py_file.name,
+        clean_mode=clean,
+        project_root=project_root,
+        extra_patterns=extra_patterns,
+    )
+    if not plan.candidates:
+        return py_file, None, None
+    return py_file, plan, None
+
+
+# Directories never worth descending into when looking for source files
+_SKIP_DIRS = frozenset({"__pycache__", ".git", ".venv"})
+
+
+def _iter_python_files(root: Path) -> Iterator[Path]:
+    """
+    Yield ``*.py`` files under ``root``, skipping caches, VCS and virtualenv dirs.
+    
+    Uses os.walk on plain strings, so a Path is only built for matching files.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+        for name in filenames:
+            if name.endswith(".py"):
+                yield Path(os.path.join(dirpath, name))
+
+
+# Files handed to a worker per task; most files are rejected by the byte
+# prefilter almost instantly, so per-file tasks would be dominated by IPC
+_SCAN_BATCH_SIZE = 8
+
+
+def _scan_batch(
+    scan: Callable[[Path], tuple[Path, Optional["MigrationPlan"], Optional[str]]],
+    batch: list[Path],
+) -> list[tuple[Path, Optional["MigrationPlan"], Optional[str]]]:
+    """Scan a batch of files inside one worker task."""
+    return [scan(py_file) for py_file in batch]
+
+
+def _iter_scan_results(
+    scan: Callable[[Path], tuple[Path, Optional["MigrationPlan"], Optional[str]]],
+    py_files: Iterable[Path],
+    workers: int,
+) -> Iterator[tuple[Path, Optional["MigrationPlan"], Optional[str]]]:
+    """
+    Yield scan results in discovery order while files are still being found.
+    
+    Files are submitted to a process pool in small batches as the iterator
+    produces them, with a bounded window of in-flight work, so the first results
+    are shown before the directory walk finishes. The pool is only started once
+    a second file turns up, so single-file runs never pay for worker startup.
+    """
+    files = iter(py_files)
+    head = list(itertools.islice(files, 2))
+    if workers <= 1 or len(head) < 2:
+        yield from map(scan, itertools.chain(head, files))
+        return
+    
+    files = itertools.chain(head, files)
+    window = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future] = deque()
+        while batch := list(itertools.islice(files, _SCAN_BATCH_SIZE)):
+            pending.append(executor.submit(_scan_batch, scan, batch))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# Files written by `init`; their contents are fixed, so skip the encoders
+_EMPTY_LOCKFILE = b"{}"
+_PROMPTS_FILE_HEADER = (
+    b"# Prompt definitions for prompt-vcs\n"
+    b"# Format:\n"
+    b"#   prompt_id:\n"
+    b"#     description: \"Description of the prompt\"\n"
+    b"#     template: |\n"
+    b"#       Your prompt template with {variables}\n"
+    b"\n"
+)
+
+
 @app.command()
 def init(
     path: Optional[Path] = typer.Argument(
@@ -94,38 +308,28 @@ def init(
     
     # Create lockfile if not exists
     if not lockfile_path.exists():
-        with open(lockfile_path, "w", encoding="utf-8") as f:
-            json.dump({}, f, indent=2)
-        console.print(f"[green]✓[/green] Created {lockfile_path.name}")
+        lockfile_path.write_bytes(_EMPTY_LOCKFILE)
+        _console().print(f"[green]✓[/green] Created {lockfile_path.name}")
     else:
-        console.print(f"[yellow]![/yellow] {lockfile_path.name} already exists")
+        _console().print(f"[yellow]![/yellow] {lockfile_path.name} already exists")
     
     if split:
         # Multi-file mode: create prompts/ directory
         if not prompts_dir.exists():
             prompts_dir.mkdir(parents=True)
-            console.print(f"[green]✓[/green] Created {prompts_dir.name}/ directory (multi-file mode)")
+            _console().print(f"[green]✓[/green] Created {prompts_dir.name}/ directory (multi-file mode)")
         else:
-            console.print(f"[yellow]![/yellow] {prompts_dir.name}/ already exists")
+            _console().print(f"[yellow]![/yellow] {prompts_dir.name}/ already exists")
     else:
         # Single-file mode (default): create prompts.yaml
         if not prompts_file.exists():
             # Create empty prompts.yaml with example comment
-            prompts_file.write_text(
-                "# Prompt definitions for prompt-vcs\n"
-                "# Format:\n"
-                "#   prompt_id:\n"
-                "#     description: \"Description of the prompt\"\n"
-                "#     template: |\n"
-                "#       Your prompt template with {variables}\n"
-                "\n",
-                encoding="utf-8"
-            )
-            console.print(f"[green]✓[/green] Created {prompts_file.name} (single-file mode)")
+            prompts_file.write_bytes(_PROMPTS_FILE_HEADER)
+            _console().print(f"[green]✓[/green] Created {prompts_file.name} (single-file mode)")
         else:
-            console.print(f"[yellow]![/yellow] {prompts_file.name} already exists")
+            _console().print(f"[yellow]![/yellow] {prompts_file.name} already exists")
     
-    console.print("\n[bold green]Project initialized successfully![/bold green]")
+    _console().print("\n[bold green]Project initialized successfully![/bold green]")
 
 
 @app.command()
@@ -156,84 +360,76 @@ def scaffold(
     - p("id", "content") function calls
     - @prompt(id="...") decorator usages
     """
+    from rich.table import Table
+    
+    from prompt_vcs.extractor import (
+        collect_unique_prompts,
+        extract_prompts_from_directory,
+        PromptIdConflictError,
+    )
+    from prompt_vcs.templates import create_yaml_template, save_prompts_file
+    
     src_path = src_dir.resolve()
     
     if not src_path.exists():
-        console.print(f"[red]Error:[/red] Source directory not found: {src_path}")
+        _console().print(f"[red]Error:[/red] Source directory not found: {src_path}")
         raise typer.Exit(1)
     
     # Find project root
-    project_root: Optional[Path] = None
-    current = src_path
-    while current != current.parent:
-        if (current / LOCKFILE_NAME).exists() or (current / ".git").exists():
-            project_root = current
-            break
-        current = current.parent
-    
-    if project_root is None:
-        project_root = Path.cwd()
+    project = find_project(src_path) or inspect_project(Path.cwd())
+    project_root = project.root
     
     # Detect mode: single-file (prompts.yaml) or multi-file (prompts/)
     prompts_file = project_root / PROMPTS_FILE
     prompts_dir = output_dir.resolve() if output_dir else project_root / PROMPTS_DIR
     
-    use_single_file = prompts_file.exists() and not output_dir
+    use_single_file = project.has_prompts_file and not output_dir
     
     if use_single_file:
-        console.print("[blue]Mode:[/blue] Single-file (prompts.yaml)")
-        console.print(f"[blue]Scanning:[/blue] {src_path}")
-        console.print(f"[blue]Output:[/blue] {prompts_file}\n")
+        _console().print("[blue]Mode:[/blue] Single-file (prompts.yaml)")
+        _console().print(f"[blue]Scanning:[/blue] {src_path}")
+        _console().print(f"[blue]Output:[/blue] {prompts_file}\n")
     else:
-        console.print("[blue]Mode:[/blue] Multi-file (prompts/)")
-        console.print(f"[blue]Scanning:[/blue] {src_path}")
-        console.print(f"[blue]Output:[/blue] {prompts_dir}\n")
-    
-    # Extract prompts
-    prompts = list(extract_prompts_from_directory(src_path))
-    
-    if not prompts:
-        console.print("[yellow]No prompts found in source code.[/yellow]")
-        return
+        _console().print("[blue]Mode:[/blue] Multi-file (prompts/)")
+        _console().print(f"[blue]Scanning:[/blue] {src_path}")
+        _console().print(f"[blue]Output:[/blue] {prompts_dir}\n")
     
-    # Check for ID conflicts
+    # Extract prompts, deduplicating by ID (keep first occurrence) and checking
+    # for ID conflicts in the same streaming pass
     try:
-        check_id_conflicts(prompts)
+        unique_prompts = collect_unique_prompts(extract_prompts_from_directory(src_path))
     except PromptIdConflictError as e:
-        console.print(f"[red]Error:[/red] {e}")
+        _console().print(f"[red]Error:[/red] {e}")
         raise typer.Exit(1)
     
-    # Deduplicate by ID (keep first occurrence)
-    seen_ids: set[str] = set()
-    unique_prompts = []
-    for prompt in prompts:
-        if prompt.id not in seen_ids:
-            seen_ids.add(prompt.id)
-            unique_prompts.append(prompt)
+    if not unique_prompts:
+        _console().print("[yellow]No prompts found in source code.[/yellow]")
+        return
     
     # Create table for display
     table = Table(title="Discovered Prompts")
     table.add_column("ID", style="cyan")
     table.add_column("Source", style="dim")
-    table.add_column("Type", style="green")
-    table.add_column("Status", style="yellow")
+    table.add_column("Type", style="green", no_wrap=True)
+    table.add_column("Status", style="yellow", no_wrap=True)
     
     created_count = 0
     skipped_count = 0
     
     # For single-file mode, load existing prompts
     existing_prompts: dict[str, dict] = {}
-    if use_single_file and prompts_file.exists():
+    if use_single_file:
         try:
-            existing_prompts = load_prompts_file(prompts_file)
+            existing_prompts = _load_prompts_file_cached(prompts_file)
         except Exception:
             existing_prompts = {}
     
     new_prompts: dict[str, dict] = {}
+    prompts_root = os.fspath(prompts_dir)
     
-    for prompt in unique_prompts:
+    for prompt in unique_prompts.values():
         prompt_type = "decorator" if prompt.is_decorator else "inline"
-        rel_source = Path(prompt.source_file).name + f":{prompt.line_number}"
+        rel_source = f"{os.path.basename(prompt.source_file)}:{prompt.line_number}"
         
         if use_single_file:
             # Single-file mode
@@ -249,26 +445,28 @@ def scaffold(
                 }
         else:
             # Multi-file mode
-            yaml_path = prompts_dir / prompt.id / "v1.yaml"
+            yaml_path = os.path.join(prompts_root, prompt.id, "v1.yaml")
             
-            if yaml_path.exists():
-                status = "exists"
-                skipped_count += 1
+            if dry_run:
+                created = not os.path.lexists(yaml_path)
             else:
+                created = create_yaml_template(
+                    yaml_path,
+                    template=prompt.default_content,
+                    version="v1",
+                    description=f"Auto-generated from {rel_source}",
+                )
+            
+            if created:
                 status = "new"
                 created_count += 1
-                
-                if not dry_run:
-                    save_yaml_template(
-                        yaml_path,
-                        template=prompt.default_content,
-                        version="v1",
-                        description=f"Auto-generated from {rel_source}",
-                    )
+            else:
+                status = "exists"
+                skipped_count += 1
         
         table.add_row(prompt.id, rel_source, prompt_type, status)
     
-    console.print(table)
+    _console().print(table)
     
     # Save new prompts in single-file mode
     if use_single_file and new_prompts and not dry_run:
@@ -278,14 +476,14 @@ def scaffold(
     
     if dry_run:
         if use_single_file:
-            console.print(f"\n[yellow]Dry run:[/yellow] Would add {created_count} prompts, skip {skipped_count}")
+            _console().print(f"\n[yellow]Dry run:[/yellow] Would add {created_count} prompts, skip {skipped_count}")
         else:
-            console.print(f"\n[yellow]Dry run:[/yellow] Would create {created_count} files, skip {skipped_count}")
+            _console().print(f"\n[yellow]Dry run:[/yellow] Would create {created_count} files, skip {skipped_count}")
     else:
         if use_single_file:
-            console.print(f"\n[green]Added:[/green] {created_count} prompts, [yellow]Skipped:[/yellow] {skipped_count}")
+            _console().print(f"\n[green]Added:[/green] {created_count} prompts, [yellow]Skipped:[/yellow] {skipped_count}")
         else:
-            console.print(f"\n[green]Created:[/green] {created_count} files, [yellow]Skipped:[/yellow] {skipped_count}")
+            _console().print(f"\n[green]Created:[/green] {created_count} files, [yellow]Skipped:[/yellow] {skipped_count}")
 
 
 @app.command()
@@ -298,44 +496,32 @@ def switch(
         ...,
         help="Version to switch to (e.g., v2)",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Switch a prompt to a specific version in the lockfile.
     """
     # Find project root
-    if project_dir:
-        project_root = project_dir.resolve()
-    else:
-        current = Path.cwd()
-        project_root = None
-        while current != current.parent:
-            if (current / LOCKFILE_NAME).exists():
-                project_root = current
-                break
-            current = current.parent
-        
-        if project_root is None:
-            console.print("[red]Error:[/red] No .prompt_lock.json found. Run 'pvcs init' first.")
-            raise typer.Exit(1)
+    project = _find_project_for(project_dir, (LOCKFILE_NAME,))
+    
+    if project is None:
+        _console().print("[red]Error:[/red] No .prompt_lock.json found. Run 'pvcs init' first.")
+        raise typer.Exit(1)
+    project_root = project.root
     
     lockfile_path = project_root / LOCKFILE_NAME
     prompts_file = project_root / PROMPTS_FILE
 
     # Single-file mode: validate version exists in prompts.yaml
-    if prompts_file.exists():
+    if project.has_prompts_file:
         try:
             prompts_cache = load_prompts_file(prompts_file)
         except Exception as e:
-            console.print(f"[red]Error:[/red] Failed to load {prompts_file.name}: {e}")
+            _console().print(f"[red]Error:[/red] Failed to load {prompts_file.name}: {e}")
             raise typer.Exit(1)
 
         if not _single_file_version_exists(prompts_cache, prompt_id, version):
-            console.print(f"[red]Error:[/red] Version '{version}' not found in prompts.yaml for '{prompt_id}'")
+            _console().print(f"[red]Error:[/red] Version '{version}' not found in prompts.yaml for '{prompt_id}'")
             available = []
             for key in prompts_cache.keys():
                 if key.startswith(f"{prompt_id}@"):
@@ -346,103 +532,113 @@ def switch(
                 available.extend(list(versions.keys()))
             available = sorted(set(available))
             if available:
-                console.print(f"[dim]Available versions:[/dim] {', '.join(available)}")
+                _console().print(f"[dim]Available versions:[/dim] {', '.join(available)}")
             else:
-                console.print("[dim]No versions found in prompts.yaml[/dim]")
+                _console().print("[dim]No versions found in prompts.yaml[/dim]")
             raise typer.Exit(1)
     else:
         yaml_path = project_root / PROMPTS_DIR / prompt_id / f"{version}.yaml"
 
         # Check if the version file exists
         if not yaml_path.exists():
-            console.print(f"[red]Error:[/red] Version file not found: {yaml_path}")
-            console.print(f"[dim]Available versions in prompts/{prompt_id}/:[/dim]")
+            _console().print(f"[red]Error:[/red] Version file not found: {yaml_path}")
+            _console().print(f"[dim]Available versions in prompts/{prompt_id}/:[/dim]")
             
-            prompt_dir = project_root / PROMPTS_DIR / prompt_id
-            if prompt_dir.exists():
-                for f in prompt_dir.glob("*.yaml"):
-                    console.print(f"  - {f.stem}")
+            try:
+                available = _yaml_versions(project_root / PROMPTS_DIR / prompt_id)
+            except FileNotFoundError:
+                _console().print("  (none)")
             else:
-                console.print("  (none)")
+                for available_version in available:
+                    _console().print(f"  - {available_version}")
             
             raise typer.Exit(1)
     
     # Load and update lockfile
-    with open(lockfile_path, "r", encoding="utf-8") as f:
-        lockfile = json.load(f)
+    lockfile = read_lockfile(lockfile_path)
     
     old_version = lockfile.get(prompt_id)
     lockfile[prompt_id] = version
     
-    with open(lockfile_path, "w", encoding="utf-8") as f:
-        json.dump(lockfile, f, indent=2, ensure_ascii=False)
+    write_lockfile(lockfile_path, lockfile)
     
     if old_version:
-        console.print(f"[green]✓[/green] Switched '{prompt_id}': {old_version} → {version}")
+        _console().print(f"[green]✓[/green] Switched '{prompt_id}': {old_version} → {version}")
     else:
-        console.print(f"[green]✓[/green] Locked '{prompt_id}' to version {version}")
+        _console().print(f"[green]✓[/green] Locked '{prompt_id}' to version {version}")
 
 
 @app.command()
 def status(
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Show current lockfile status.
     """
+    from rich.table import Table
+    
     # Find project root
-    if project_dir:
-        project_root = project_dir.resolve()
-    else:
-        current = Path.cwd()
-        project_root = None
-        while current != current.parent:
-            if (current / LOCKFILE_NAME).exists():
-                project_root = current
-                break
-            current = current.parent
-        
-        if project_root is None:
-            console.print("[red]Error:[/red] No .prompt_lock.json found. Run 'pvcs init' first.")
-            raise typer.Exit(1)
+    project = _find_project_for(project_dir, (LOCKFILE_NAME,))
+    
+    if project is None:
+        _console().print("[red]Error:[/red] No .prompt_lock.json found. Run 'pvcs init' first.")
+        raise typer.Exit(1)
+    project_root = project.root
     
     lockfile_path = project_root / LOCKFILE_NAME
     
-    with open(lockfile_path, "r", encoding="utf-8") as f:
-        lockfile = json.load(f)
+    lockfile = read_lockfile(lockfile_path)
     
     if not lockfile:
-        console.print("[yellow]Lockfile is empty.[/yellow] No prompts are version-locked.")
+        _console().print("[yellow]Lockfile is empty.[/yellow] No prompts are version-locked.")
         return
     
     table = Table(title="Locked Prompts")
     table.add_column("Prompt ID", style="cyan")
-    table.add_column("Version", style="green")
-    table.add_column("File Status", style="yellow")
+    table.add_column("Version", style="green", no_wrap=True)
+    table.add_column("File Status", style="yellow", no_wrap=True)
 
     prompts_file = project_root / PROMPTS_FILE
     prompts_cache: Optional[dict] = None
-    if prompts_file.exists():
+    if project.has_prompts_file:
         try:
             prompts_cache = load_prompts_file(prompts_file)
         except Exception as e:
-            console.print(f"[red]Error:[/red] Failed to load {prompts_file.name}: {e}")
+            _console().print(f"[red]Error:[/red] Failed to load {prompts_file.name}: {e}")
             raise typer.Exit(1)
     
+    # Multi-file mode: list each locked prompt's directory once instead of
+    # stat()ing every version file individually
+    available: dict[str, set[str]] = {}
+    if prompts_cache is None:
+        try:
+            with os.scandir(project_root / PROMPTS_DIR) as entries:
+                for entry in entries:
+                    if entry.name in lockfile and entry.is_dir():
+                        available[entry.name] = set(_yaml_versions(entry.path))
+        except FileNotFoundError:
+            pass
+        
+        # Nested IDs like "chat/system" (or names the scan missed) are looked
+        # up by path, the same way PromptManager resolves them
+        for prompt_id in lockfile:
+            if prompt_id not in available:
+                try:
+                    available[prompt_id] = set(
+                        _yaml_versions(project_root / PROMPTS_DIR / prompt_id)
+                    )
+                except (FileNotFoundError, NotADirectoryError):
+                    pass
+    
     for prompt_id, version in sorted(lockfile.items()):
         if prompts_cache is not None:
             exists = _single_file_version_exists(prompts_cache, prompt_id, version)
-            file_status = "✓" if exists else "✗ missing"
         else:
-            yaml_path = project_root / PROMPTS_DIR / prompt_id / f"{version}.yaml"
-            file_status = "✓" if yaml_path.exists() else "✗ missing"
+            exists = version in available.get(prompt_id, ())
+        file_status = "✓" if exists else "✗ missing"
         table.add_row(prompt_id, version, file_status)
     
-    console.print(table)
+    _console().print(table)
 
 
 @app.command()
@@ -471,6 +667,11 @@ def migrate(
         "--pattern", "-p",
         help="Additional variable name patterns to match (e.g. 'content', 'sql')",
     ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs", "-j",
+        help="Number of worker processes used to scan files (defaults to CPU count)",
+    ),
 ) -> None:
     """
     Migrate hardcoded prompt strings to p() calls.
@@ -488,85 +689,82 @@ def migrate(
     - Generates p() calls without default content
     - Skips existing YAML files (won't overwrite)
     """
+    from rich.console import Group
     from rich.syntax import Syntax
     from rich.panel import Panel
-    from rich.prompt import Confirm
-    
-    from prompt_vcs.codemod import migrate_file_content
+    from rich.prompt import Confirm, Prompt
     
     target_path = path.resolve()
     
     if not target_path.exists():
-        console.print(f"[red]Error:[/red] Path not found: {target_path}")
+        _console().print(f"[red]Error:[/red] Path not found: {target_path}")
         raise typer.Exit(1)
     
     # Find project root for clean mode
     project_root: Optional[Path] = None
     use_single_file = False  # Track which mode we're using
     if clean:
-        current = target_path if target_path.is_dir() else target_path.parent
-        while current != current.parent:
-            if (current / LOCKFILE_NAME).exists() or (current / ".git").exists():
-                project_root = current
-                break
-            current = current.parent
+        project = find_project(target_path if target_path.is_dir() else target_path.parent)
         
-        if project_root is None:
-            project_root = Path.cwd()
-            console.print(f"[yellow]Warning:[/yellow] No project root found, using current directory: {project_root}")
+        if project is None:
+            project = inspect_project(Path.cwd())
+            _console().print(f"[yellow]Warning:[/yellow] No project root found, using current directory: {project.root}")
         else:
-            console.print(f"[blue]Project root:[/blue] {project_root}")
+            _console().print(f"[blue]Project root:[/blue] {project.root}")
+        project_root = project.root
         
         # Detect single-file vs multi-file mode
         prompts_yaml_path = project_root / PROMPTS_FILE
-        if prompts_yaml_path.exists():
+        if project.has_prompts_file:
             use_single_file = True
-            console.print(f"[blue]Clean mode:[/blue] Prompts will be written to {prompts_yaml_path.name}\n")
+            _console().print(f"[blue]Clean mode:[/blue] Prompts will be written to {prompts_yaml_path.name}\n")
         else:
-            console.print(f"[blue]Clean mode:[/blue] Prompts will be written to {project_root / PROMPTS_DIR}/\n")
+            _console().print(f"[blue]Clean mode:[/blue] Prompts will be written to {project_root / PROMPTS_DIR}/\n")
     
-    # Collect Python files
+    # Collect Python files lazily so scanning starts while the tree is walked
+    py_files: Iterable[Path]
     if target_path.is_file():
         if not target_path.suffix == ".py":
-            console.print(f"[red]Error:[/red] Not a Python file: {target_path}")
+            _console().print(f"[red]Error:[/red] Not a Python file: {target_path}")
             raise typer.Exit(1)
         py_files = [target_path]
     else:
-        py_files = list(target_path.rglob("*.py"))
-    
-    if not py_files:
-        console.print("[yellow]No Python files found.[/yellow]")
-        return
+        py_files = _iter_python_files(target_path)
     
-    console.print(f"[blue]Scanning:[/blue] {len(py_files)} Python file(s)\n")
+    _console().print(f"[blue]Scanning:[/blue] {target_path}\n")
     
+    scanned_files = 0
     total_candidates = 0
     applied_total = 0
     skipped_total = 0
     yaml_written_count = 0
 
-    for py_file in py_files:
-        try:
-            content = py_file.read_text(encoding="utf-8")
-        except Exception as e:
-            console.print(f"[yellow]Warning:[/yellow] Could not read {py_file}: {e}")
+    # First pass: collect candidates without applying. Files are independent,
+    # so parse them in worker processes; confirmation and writes stay serial.
+    scan = functools.partial(
+        _scan_python_file,
+        clean=clean,
+        project_root=project_root,
+        extra_patterns=pattern,
+    )
+    workers = jobs if jobs is not None else (os.cpu_count() or 1)
+    root_prefix = os.path.join(os.fspath(project_root), "") if project_root else ""
+
+    # Display paths relative to the scanned directory via string slicing
+    display_prefix = os.path.join(str(target_path.parent if target_path.is_file() else target_path), "")
+
+    for py_file, plan, read_error in _iter_scan_results(scan, py_files, workers):
+        scanned_files += 1
+        if read_error is not None:
+            _console().print(f"[yellow]Warning:[/yellow] Could not read {py_file}: {read_error}")
             continue
         
-        # First pass: collect candidates without applying
-        _, candidates = migrate_file_content(
-            content, 
-            py_file.name, 
-            apply_changes=False,
-            clean_mode=clean,
-            project_root=project_root,
-            extra_patterns=pattern,
-        )
-        
-        if not candidates:
+        if plan is None:
             continue
+        candidates = plan.candidates
         
-        console.print(f"\n[bold cyan]File:[/bold cyan] {py_file.relative_to(target_path.parent if target_path.is_file() else target_path)}")
-        console.print(f"[dim]Found {len(candidates)} migration candidate(s)[/dim]\n")
+        _console().print(f"\n[bold cyan]File:[/bold cyan] {str(py_file)[len(display_prefix):]}")
+        _console().print(f"[dim]Found {len(candidates)} migration candidate(s)[/dim]\n")
         
         approved_ids: set[str] = set()
         existing_yaml_ids: set[str] = set()
@@ -575,7 +773,7 @@ def migrate(
         if clean and project_root and use_single_file:
             try:
                 existing_prompt_ids = set(
-                    load_prompts_file(project_root / PROMPTS_FILE).keys()
+                    _load_prompts_file_cached(project_root / PROMPTS_FILE).keys()
                 )
             except Exception:
                 existing_prompt_ids = set()
@@ -583,61 +781,78 @@ def migrate(
         for candidate in candidates:
             total_candidates += 1
             
-            # Show diff
-            console.print(f"[bold]Line {candidate.line_number}:[/bold] [cyan]{candidate.variable_name}[/cyan] → [green]{candidate.prompt_id}[/green]")
+            # Build everything shown for this candidate, then print it in one go
+            renderables: list = [
+                f"[bold]Line {candidate.line_number}:[/bold] [cyan]{candidate.variable_name}[/cyan] → [green]{candidate.prompt_id}[/green]"
+            ]
             
             # In clean mode, show YAML file status
             if clean and project_root:
                 if use_single_file:
-                    console.print("[green]  → Will add to:[/green] prompts.yaml")
+                    renderables.append("[green]  → Will add to:[/green] prompts.yaml")
                 else:
-                    yaml_path = project_root / PROMPTS_DIR / candidate.prompt_id / "v1.yaml"
-                    if yaml_path.exists():
+                    rel_yaml = os.path.join(PROMPTS_DIR, candidate.prompt_id, "v1.yaml")
+                    if os.path.lexists(root_prefix + rel_yaml):
                         existing_yaml_ids.add(candidate.prompt_id)
-                        console.print(f"[yellow]  ⚠ YAML file exists, will skip:[/yellow] {yaml_path.relative_to(project_root)}")
+                        renderables.append(f"[yellow]  ⚠ YAML file exists, will skip:[/yellow] {rel_yaml}")
                     else:
-                        console.print(f"[green]  → Will create:[/green] {yaml_path.relative_to(project_root)}")
+                        renderables.append(f"[green]  → Will create:[/green] {rel_yaml}")
             
             # Original code (red)
-            console.print(Panel(
-                Syntax(candidate.original_code.strip(), "python", theme="monokai"),
+            renderables.append(Panel(
+                Syntax(candidate.original_code.strip(), _syntax_lexer("python"), theme="monokai"),
                 title="[red]Before[/red]",
                 border_style="red",
             ))
             
             # New code (green)
-            console.print(Panel(
-                Syntax(candidate.new_code.strip(), "python", theme="monokai"),
+            renderables.append(Panel(
+                Syntax(candidate.new_code.strip(), _syntax_lexer("python"), theme="monokai"),
                 title="[green]After[/green]",
                 border_style="green",
             ))
             
             if dry_run:
-                console.print("[yellow]Dry run - no changes applied[/yellow]\n")
+                renderables.append("[yellow]Dry run - no changes applied[/yellow]\n")
                 skipped_total += 1
-                continue
             
-            # Ask for confirmation
-            if yes or Confirm.ask("Apply this change?", default=True):
-                approved_ids.add(candidate.prompt_id)
+            _console().print(Group(*renderables))
+        
+        # Ask once per file instead of once per candidate
+        if not dry_run:
+            if yes:
+                choice = "a"
+            else:
+                choice = Prompt.ask(
+                    "Apply changes? \\[a]ll/\\[n]one/\\[s]elect",
+                    choices=["a", "n", "s"],
+                    default="a",
+                    show_choices=False,
+                )
+            
+            if choice == "a":
+                approved_ids.update(c.prompt_id for c in candidates)
+            elif choice == "n":
+                skipped_total += len(candidates)
+                _console().print("[dim]Skipped[/dim]\n")
             else:
-                skipped_total += 1
-                console.print("[dim]Skipped[/dim]\n")
+                for candidate in candidates:
+                    prompt_text = (
+                        f"Apply line {candidate.line_number} "
+                        f"({candidate.prompt_id})?"
+                    )
+                    if Confirm.ask(prompt_text, default=True):
+                        approved_ids.add(candidate.prompt_id)
+                    else:
+                        skipped_total += 1
+                        _console().print("[dim]Skipped[/dim]\n")
         
         # If any changes were approved, apply them all at once
         if not dry_run and approved_ids:
-            modified_content, applied_candidates = migrate_file_content(
-                content, 
-                py_file.name, 
-                apply_changes=True,
-                clean_mode=clean,
-                project_root=project_root,
-                extra_patterns=pattern,
-                approved_prompt_ids=approved_ids,
-            )
+            modified_content, applied_candidates = plan.apply(approved_ids)
             if applied_candidates:
                 py_file.write_text(modified_content, encoding="utf-8")
-                console.print(f"[green]✓[/green] Applied changes to {py_file.name}")
+                _console().print(f"[green]✓[/green] Applied changes to {py_file.name}")
             applied_total += len(applied_candidates)
             
             # In clean mode, report YAML file status
@@ -646,7 +861,7 @@ def migrate(
                     added = 0
                     try:
                         after_ids = set(
-                            load_prompts_file(project_root / PROMPTS_FILE).keys()
+                            _load_prompts_file_cached(project_root / PROMPTS_FILE).keys()
                         )
                         new_ids = after_ids - existing_prompt_ids
                         applied_ids = {c.prompt_id for c in applied_candidates}
@@ -654,28 +869,90 @@ def migrate(
                     except Exception:
                         added = len(applied_candidates)
                     yaml_written_count += added
-                    console.print(f"[green]  ✓[/green] Added {added} prompt(s) to prompts.yaml")
+                    _console().print(f"[green]  ✓[/green] Added {added} prompt(s) to prompts.yaml")
                 else:
                     for cand in applied_candidates:
-                        yaml_path = project_root / PROMPTS_DIR / cand.prompt_id / "v1.yaml"
                         if cand.prompt_id in existing_yaml_ids:
                             continue
-                        if yaml_path.exists():
+                        rel_yaml = os.path.join(PROMPTS_DIR, cand.prompt_id, "v1.yaml")
+                        if os.path.lexists(root_prefix + rel_yaml):
                             # Check if we just created it (file mtime is recent)
                             yaml_written_count += 1
-                            console.print(f"[green]  ✓[/green] Created: {yaml_path.relative_to(project_root)}")
+                            _console().print(f"[green]  ✓[/green] Created: {rel_yaml}")
+    
+    if not scanned_files:
+        _console().print("[yellow]No Python files found.[/yellow]")
+        return
     
     # Summary
-    console.print("\n" + "=" * 50)
-    console.print("[bold]Migration Summary[/bold]")
-    console.print(f"  Total candidates: {total_candidates}")
+    _console().print("\n" + "=" * 50)
+    _console().print("[bold]Migration Summary[/bold]")
+    _console().print(f"  Files scanned: {scanned_files}")
+    _console().print(f"  Total candidates: {total_candidates}")
     if not dry_run:
-        console.print(f"  [green]Applied:[/green] {applied_total}")
-        console.print(f"  [yellow]Skipped:[/yellow] {skipped_total}")
+        _console().print(f"  [green]Applied:[/green] {applied_total}")
+        _console().print(f"  [yellow]Skipped:[/yellow] {skipped_total}")
         if clean:
-            console.print(f"  [green]YAML files created:[/green] {yaml_written_count}")
+            _console().print(f"  [green]YAML files created:[/green] {yaml_written_count}")
     else:
-        console.print("  [yellow]Dry run - no changes applied[/yellow]")
+        _console().print("  [yellow]Dry run - no changes applied[/yellow]")
+
+
+# Combined size above which `diff` hands version files to git's native diff.
+# Below this, spawning git costs more than difflib (git only wins from ~100 KiB)
+_NATIVE_DIFF_THRESHOLD = 256 * 1024
+
+
+def _git_diff_files(
+    path1: Path,
+    path2: Path,
+    fromfile: str,
+    tofile: str,
+) -> Optional[list[str]]:
+    """
+    Diff two files with `git diff --no-index`, formatted like difflib's output.
+    
+    Returns:
+        Unified diff lines (empty if the files are identical), or None if git is
+        unavailable, fails, or reports no text hunks (e.g. binary files), in
+        which case callers fall back to difflib
+    """
+    import subprocess
+    
+    try:
+        result = subprocess.run(
+            [
+                # Pin everything user or repo config could change, so the text
+                # matches what difflib prints for smaller files
+                "git", "--no-pager", "-c", "diff.algorithm=myers",
+                "diff", "--no-index", "--no-color", "--no-ext-diff",
+                "--no-textconv", "--no-indent-heuristic", "-U3",
+                "--", str(path1), str(path2),
+            ],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+    
+    # --no-index exits with 1 when the files differ, 0 when they match
+    if result.returncode == 0:
+        return []
+    if result.returncode != 1:
+        return None
+    
+    lines = result.stdout.splitlines(keepends=True)
+    for index, line in enumerate(lines):
+        if line.startswith("@@"):
+            # Replace git's header (absolute paths, index line) with difflib's,
+            # and drop the function context git appends to hunk headers
+            hunks = [
+                hunk[:hunk.index("@@", 2) + 2] + "\n" if hunk.startswith("@@") else hunk
+                for hunk in lines[index:]
+            ]
+            return [f"--- {fromfile}\n", f"+++ {tofile}\n", *hunks]
+    return None
 
 
 @app.command()
@@ -692,11 +969,7 @@ def diff(
         ...,
         help="Second version (e.g., v2)",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Compare two versions of a prompt.
@@ -708,38 +981,31 @@ def diff(
     from rich.panel import Panel
     
     # Find project root
-    if project_dir:
-        project_root = project_dir.resolve()
-    else:
-        current = Path.cwd()
-        project_root = None
-        while current != current.parent:
-            if (current / LOCKFILE_NAME).exists() or (current / ".git").exists():
-                project_root = current
-                break
-            current = current.parent
-        
-        if project_root is None:
-            console.print("[red]Error:[/red] No project root found. Run 'pvcs init' first.")
-            raise typer.Exit(1)
+    project = _find_project_for(project_dir)
     
+    if project is None:
+        _console().print("[red]Error:[/red] No project root found. Run 'pvcs init' first.")
+        raise typer.Exit(1)
+    project_root = project.root
+    
+    diff_lines: Optional[list[str]] = None
     prompts_file = project_root / PROMPTS_FILE
-    if prompts_file.exists():
+    if project.has_prompts_file:
         try:
             prompts_cache = load_prompts_file(prompts_file)
         except Exception as e:
-            console.print(f"[red]Error:[/red] Failed to load {prompts_file.name}: {e}")
+            _console().print(f"[red]Error:[/red] Failed to load {prompts_file.name}: {e}")
             raise typer.Exit(1)
 
         template1 = _single_file_version_template(prompts_cache, prompt_id, version1)
         template2 = _single_file_version_template(prompts_cache, prompt_id, version2)
 
         if template1 is None:
-            console.print(f"[red]Error:[/red] Version '{version1}' not found in prompts.yaml for '{prompt_id}'")
+            _console().print(f"[red]Error:[/red] Version '{version1}' not found in prompts.yaml for '{prompt_id}'")
             raise typer.Exit(1)
 
         if template2 is None:
-            console.print(f"[red]Error:[/red] Version '{version2}' not found in prompts.yaml for '{prompt_id}'")
+            _console().print(f"[red]Error:[/red] Version '{version2}' not found in prompts.yaml for '{prompt_id}'")
             raise typer.Exit(1)
 
         content1 = template1.splitlines(keepends=True)
@@ -751,36 +1017,45 @@ def diff(
         yaml_path2 = project_root / PROMPTS_DIR / prompt_id / f"{version2}.yaml"
 
         if not yaml_path1.exists():
-            console.print(f"[red]Error:[/red] Version file not found: {yaml_path1}")
+            _console().print(f"[red]Error:[/red] Version file not found: {yaml_path1}")
             raise typer.Exit(1)
 
         if not yaml_path2.exists():
-            console.print(f"[red]Error:[/red] Version file not found: {yaml_path2}")
+            _console().print(f"[red]Error:[/red] Version file not found: {yaml_path2}")
             raise typer.Exit(1)
 
-        content1 = yaml_path1.read_text(encoding="utf-8").splitlines(keepends=True)
-        content2 = yaml_path2.read_text(encoding="utf-8").splitlines(keepends=True)
         fromfile = f"prompts/{prompt_id}/{version1}.yaml"
         tofile = f"prompts/{prompt_id}/{version2}.yaml"
+        
+        # Large version files are diffed by git's C implementation
+        native_diff = None
+        if yaml_path1.stat().st_size + yaml_path2.stat().st_size > _NATIVE_DIFF_THRESHOLD:
+            native_diff = _git_diff_files(yaml_path1, yaml_path2, fromfile, tofile)
+        if native_diff is not None:
+            diff_lines = native_diff
+        else:
+            content1 = yaml_path1.read_text(encoding="utf-8").splitlines(keepends=True)
+            content2 = yaml_path2.read_text(encoding="utf-8").splitlines(keepends=True)
     
     # Generate diff
-    diff_lines = list(difflib.unified_diff(
-        content1,
-        content2,
-        fromfile=fromfile,
-        tofile=tofile,
-    ))
+    if diff_lines is None:
+        diff_lines = list(difflib.unified_diff(
+            content1,
+            content2,
+            fromfile=fromfile,
+            tofile=tofile,
+        ))
     
     if not diff_lines:
-        console.print(f"[green]No differences[/green] between {version1} and {version2}")
+        _console().print(f"[green]No differences[/green] between {version1} and {version2}")
         return
     
     # Display diff with syntax highlighting
-    console.print(f"\n[bold]Diff:[/bold] {prompt_id} ({version1} → {version2})\n")
+    _console().print(f"\n[bold]Diff:[/bold] {prompt_id} ({version1} → {version2})\n")
     
     diff_text = "".join(diff_lines)
-    console.print(Panel(
-        Syntax(diff_text, "diff", theme="monokai"),
+    _console().print(Panel(
+        Syntax(diff_text, _syntax_lexer("diff"), theme="monokai"),
         border_style="blue",
     ))
 
@@ -796,11 +1071,7 @@ def log(
         "--count", "-n",
         help="Number of commits to show",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Show Git commit history for a prompt.
@@ -810,41 +1081,33 @@ def log(
     import subprocess
     
     # Find project root
-    if project_dir:
-        project_root = project_dir.resolve()
-    else:
-        current = Path.cwd()
-        project_root = None
-        while current != current.parent:
-            if (current / LOCKFILE_NAME).exists() or (current / ".git").exists():
-                project_root = current
-                break
-            current = current.parent
-        
-        if project_root is None:
-            console.print("[red]Error:[/red] No project root found.")
-            raise typer.Exit(1)
+    project = _find_project_for(project_dir)
     
-    # Check for .git directory
-    if not (project_root / ".git").exists():
-        console.print("[red]Error:[/red] Not a Git repository.")
+    if project is None:
+        _console().print("[red]Error:[/red] No project root found.")
+        raise typer.Exit(1)
+    project_root = project.root
+    
+    # Check for .git directory (recorded while locating the root)
+    if not project.has_git:
+        _console().print("[red]Error:[/red] Not a Git repository.")
         raise typer.Exit(1)
     
     # Determine path to show history for
     prompts_file = project_root / PROMPTS_FILE
-    if prompts_file.exists():
+    if project.has_prompts_file:
         # Single-file mode: show history for prompts.yaml
         target_path = prompts_file
-        console.print("[blue]Mode:[/blue] Single-file (prompts.yaml)")
+        _console().print("[blue]Mode:[/blue] Single-file (prompts.yaml)")
     else:
         # Multi-file mode: show history for the prompt directory
         target_path = project_root / PROMPTS_DIR / prompt_id
         if not target_path.exists():
-            console.print(f"[red]Error:[/red] Prompt not found: {prompt_id}")
+            _console().print(f"[red]Error:[/red] Prompt not found: {prompt_id}")
             raise typer.Exit(1)
-        console.print(f"[blue]Mode:[/blue] Multi-file (prompts/{prompt_id}/)")
+        _console().print(f"[blue]Mode:[/blue] Multi-file (prompts/{prompt_id}/)")
     
-    console.print(f"[blue]History for:[/blue] {prompt_id}\n")
+    _console().print(f"[blue]History for:[/blue] {prompt_id}\n")
     
     # Run git log
     try:
@@ -863,11 +1126,11 @@ def log(
         )
         
         if result.returncode != 0:
-            console.print(f"[red]Error:[/red] Git command failed: {result.stderr}")
+            _console().print(f"[red]Error:[/red] Git command failed: {result.stderr}")
             raise typer.Exit(1)
         
         if not result.stdout.strip():
-            console.print("[yellow]No commits found for this prompt.[/yellow]")
+            _console().print("[yellow]No commits found for this prompt.[/yellow]")
             return
         
         # Display commits
@@ -875,12 +1138,12 @@ def log(
             parts = line.split(" ", 1)
             if len(parts) == 2:
                 commit_hash, message = parts
-                console.print(f"[cyan]{commit_hash}[/cyan] {message}")
+                _console().print(f"[cyan]{commit_hash}[/cyan] {message}")
             else:
-                console.print(line)
+                _console().print(line)
                 
     except FileNotFoundError:
-        console.print("[red]Error:[/red] Git is not installed or not in PATH.")
+        _console().print("[red]Error:[/red] Git is not installed or not in PATH.")
         raise typer.Exit(1)
 
 
@@ -912,52 +1175,53 @@ def validate(
         pvcs validate user_greeting "Hello, Alice!" --config validation.yaml
     """
     from prompt_vcs.validator import create_validator_from_yaml
+    from prompt_vcs.templates import SafeLoader
     import yaml
 
     if not config_file:
-        console.print("[red]Error:[/red] --config is required for validation")
+        _console().print("[red]Error:[/red] --config is required for validation")
         raise typer.Exit(1)
 
     if not config_file.exists():
-        console.print(f"[red]Error:[/red] Config file not found: {config_file}")
+        _console().print(f"[red]Error:[/red] Config file not found: {config_file}")
         raise typer.Exit(1)
 
     # Load validation config
     try:
         with open(config_file, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=SafeLoader)
     except Exception as e:
-        console.print(f"[red]Error:[/red] Failed to load config: {e}")
+        _console().print(f"[red]Error:[/red] Failed to load config: {e}")
         raise typer.Exit(1)
 
     # Create validator
     try:
         validator = create_validator_from_yaml(config)
     except Exception as e:
-        console.print(f"[red]Error:[/red] Failed to create validator: {e}")
+        _console().print(f"[red]Error:[/red] Failed to create validator: {e}")
         raise typer.Exit(1)
 
     # Run validation
     results = validator.validate(output)
 
     # Display results
-    console.print(f"\n[bold]Validation Results for:[/bold] {prompt_id}\n")
+    _console().print(f"\n[bold]Validation Results for:[/bold] {prompt_id}\n")
 
     all_passed = True
     for result in results:
         if result.passed:
-            console.print(f"[green]✓[/green] {result.rule_name}")
+            _console().print(f"[green]✓[/green] {result.rule_name}")
         else:
-            console.print(f"[red]✗[/red] {result.rule_name}")
+            _console().print(f"[red]✗[/red] {result.rule_name}")
             if result.error_message:
-                console.print(f"  [red]{result.error_message}[/red]")
+                _console().print(f"  [red]{result.error_message}[/red]")
             all_passed = False
 
-    console.print()
+    _console().print()
     if all_passed:
-        console.print("[bold green]All validation rules passed! ✓[/bold green]")
+        _console().print("[bold green]All validation rules passed! ✓[/bold green]")
     else:
-        console.print("[bold red]Some validation rules failed! ✗[/bold red]")
+        _console().print("[bold red]Some validation rules failed! ✗[/bold red]")
         raise typer.Exit(1)
 
 
@@ -999,27 +1263,27 @@ def test(
     )
 
     if not test_file.exists():
-        console.print(f"[red]Error:[/red] Test file not found: {test_file}")
+        _console().print(f"[red]Error:[/red] Test file not found: {test_file}")
         raise typer.Exit(1)
 
     # Load test suite
     try:
         test_suite = load_test_suite_from_yaml(test_file)
     except Exception as e:
-        console.print(f"[red]Error:[/red] Failed to load test suite: {e}")
+        _console().print(f"[red]Error:[/red] Failed to load test suite: {e}")
         raise typer.Exit(1)
 
-    console.print(f"[bold]Test Suite:[/bold] {test_suite.name}")
+    _console().print(f"[bold]Test Suite:[/bold] {test_suite.name}")
     if test_suite.description:
-        console.print(f"[dim]{test_suite.description}[/dim]")
-    console.print()
+        _console().print(f"[dim]{test_suite.description}[/dim]")
+    _console().print()
 
     # Create test runner
     runner = PromptTestRunner(project_root=project)
 
     # Run tests
     if tag:
-        console.print(f"[blue]Running tests with tag:[/blue] {tag}\n")
+        _console().print(f"[blue]Running tests with tag:[/blue] {tag}\n")
         results = runner.run_tests_by_tag(test_suite, tag)
     else:
         results = runner.run_suite(test_suite)
@@ -1088,7 +1352,7 @@ def ab_create(
     if weights:
         weight_list = [float(w.strip()) for w in weights.split(",")]
         if len(weight_list) != len(variant_list):
-            console.print("[red]Error:[/red] Number of weights must match number of variants")
+            _console().print("[red]Error:[/red] Number of weights must match number of variants")
             raise typer.Exit(1)
     else:
         weight_list = [1.0] * len(variant_list)
@@ -1111,31 +1375,28 @@ def ab_create(
     manager = ABTestManager.get_instance()
     manager.create_experiment(config)
     
-    console.print(f"[green]✓[/green] Created A/B test experiment: [cyan]{name}[/cyan]")
-    console.print(f"  Prompt ID: {prompt_id}")
-    console.print(f"  Variants: {', '.join(variant_list)}")
+    _console().print(f"[green]✓[/green] Created A/B test experiment: [cyan]{name}[/cyan]")
+    _console().print(f"  Prompt ID: {prompt_id}")
+    _console().print(f"  Variants: {', '.join(variant_list)}")
     if description:
-        console.print(f"  Description: {description}")
+        _console().print(f"  Description: {description}")
 
 
 @ab_app.command("list")
 def ab_list(
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     List all A/B test experiments.
     """
+    from rich.table import Table
     from prompt_vcs.ab_testing import ABTestManager
     
     manager = ABTestManager.get_instance(project_dir)
     experiments = manager.list_experiments()
     
     if not experiments:
-        console.print("[yellow]No A/B test experiments found.[/yellow]")
+        _console().print("[yellow]No A/B test experiments found.[/yellow]")
         return
     
     table = Table(title="A/B Test Experiments")
@@ -1151,7 +1412,7 @@ def ab_list(
         created = exp.created_at.strftime("%Y-%m-%d")
         table.add_row(exp.name, exp.prompt_id, variants_str, status, created)
     
-    console.print(table)
+    _console().print(table)
 
 
 @ab_app.command("status")
@@ -1160,36 +1421,33 @@ def ab_status(
         ...,
         help="Experiment name",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Show status of an A/B test experiment.
     """
+    from rich.table import Table
     from prompt_vcs.ab_testing import ABTestManager
     
     manager = ABTestManager.get_instance(project_dir)
     config = manager.get_experiment(name)
     
     if not config:
-        console.print(f"[red]Error:[/red] Experiment '{name}' not found")
+        _console().print(f"[red]Error:[/red] Experiment '{name}' not found")
         raise typer.Exit(1)
     
     # Get record count
     storage = manager._get_storage()
     record_count = storage.get_record_count(name)
     
-    console.print(f"[bold]Experiment:[/bold] {config.name}")
-    console.print(f"[dim]Prompt ID:[/dim] {config.prompt_id}")
+    _console().print(f"[bold]Experiment:[/bold] {config.name}")
+    _console().print(f"[dim]Prompt ID:[/dim] {config.prompt_id}")
     if config.description:
-        console.print(f"[dim]Description:[/dim] {config.description}")
-    console.print(f"[dim]Status:[/dim] {'Active' if config.is_active else 'Inactive'}")
-    console.print(f"[dim]Created:[/dim] {config.created_at.strftime('%Y-%m-%d %H:%M')}")
-    console.print(f"[dim]Total Records:[/dim] {record_count}")
-    console.print()
+        _console().print(f"[dim]Description:[/dim] {config.description}")
+    _console().print(f"[dim]Status:[/dim] {'Active' if config.is_active else 'Inactive'}")
+    _console().print(f"[dim]Created:[/dim] {config.created_at.strftime('%Y-%m-%d %H:%M')}")
+    _console().print(f"[dim]Total Records:[/dim] {record_count}")
+    _console().print()
     
     # Show variants
     table = Table(title="Variants")
@@ -1202,7 +1460,7 @@ def ab_status(
         traffic_pct = (variant.weight / total_weight * 100) if total_weight > 0 else 0
         table.add_row(variant.version, f"{variant.weight:.1f}", f"{traffic_pct:.1f}%")
     
-    console.print(table)
+    _console().print(table)
 
 
 @ab_app.command("analyze")
@@ -1211,15 +1469,12 @@ def ab_analyze(
         ...,
         help="Experiment name",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Analyze results of an A/B test experiment.
     """
+    from rich.table import Table
     from prompt_vcs.ab_testing import ABTestManager
     
     manager = ABTestManager.get_instance(project_dir)
@@ -1227,18 +1482,18 @@ def ab_analyze(
     try:
         result = manager.analyze(name)
     except ValueError as e:
-        console.print(f"[red]Error:[/red] {e}")
+        _console().print(f"[red]Error:[/red] {e}")
         raise typer.Exit(1)
     
     if result.total_records == 0:
-        console.print(f"[yellow]No records found for experiment '{name}'[/yellow]")
-        console.print("[dim]Run some tests first to collect data.[/dim]")
+        _console().print(f"[yellow]No records found for experiment '{name}'[/yellow]")
+        _console().print("[dim]Run some tests first to collect data.[/dim]")
         return
     
-    console.print(f"[bold]Analysis Results: {result.experiment_name}[/bold]")
-    console.print(f"[dim]Prompt ID:[/dim] {result.prompt_id}")
-    console.print(f"[dim]Total Records:[/dim] {result.total_records}")
-    console.print()
+    _console().print(f"[bold]Analysis Results: {result.experiment_name}[/bold]")
+    _console().print(f"[dim]Prompt ID:[/dim] {result.prompt_id}")
+    _console().print(f"[dim]Total Records:[/dim] {result.total_records}")
+    _console().print()
     
     # Results table
     table = Table(title="Variant Performance")
@@ -1252,15 +1507,15 @@ def ab_analyze(
         latency_str = f"{stats.avg_latency_ms:.1f}ms" if stats.avg_latency_ms else "N/A"
         table.add_row(version, str(stats.count), score_str, latency_str)
     
-    console.print(table)
+    _console().print(table)
     
     # Winner
     if result.winner:
-        console.print()
-        console.print(f"[bold green]Winner: {result.winner}[/bold green] (confidence: {result.confidence:.1%})")
+        _console().print()
+        _console().print(f"[bold green]Winner: {result.winner}[/bold green] (confidence: {result.confidence:.1%})")
     else:
-        console.print()
-        console.print("[yellow]No clear winner yet.[/yellow] Collect more data or ensure scores are recorded.")
+        _console().print()
+        _console().print("[yellow]No clear winner yet.[/yellow] Collect more data or ensure scores are recorded.")
 
 
 @ab_app.command("record")
@@ -1283,11 +1538,7 @@ def ab_record(
         "--output", "-o",
         help="LLM output to record",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Manually record an A/B test result.
@@ -1303,19 +1554,19 @@ def ab_record(
     config = manager.get_experiment(name)
     
     if not config:
-        console.print(f"[red]Error:[/red] Experiment '{name}' not found")
+        _console().print(f"[red]Error:[/red] Experiment '{name}' not found")
         raise typer.Exit(1)
     
     # Check variant exists
     variant_versions = [v.version for v in config.variants]
     if variant not in variant_versions:
-        console.print(f"[red]Error:[/red] Variant '{variant}' not in experiment")
-        console.print(f"[dim]Available variants: {', '.join(variant_versions)}[/dim]")
+        _console().print(f"[red]Error:[/red] Variant '{variant}' not in experiment")
+        _console().print(f"[dim]Available variants: {', '.join(variant_versions)}[/dim]")
         raise typer.Exit(1)
     
     # Validate score
     if score < 0 or score > 1:
-        console.print("[red]Error:[/red] Score must be between 0.0 and 1.0")
+        _console().print("[red]Error:[/red] Score must be between 0.0 and 1.0")
         raise typer.Exit(1)
     
     # Create and save record
@@ -1332,10 +1583,10 @@ def ab_record(
     
     manager.save_record(record)
     
-    console.print(f"[green]✓[/green] Recorded result for {name}/{variant}")
-    console.print(f"  Score: {score:.2f}")
+    _console().print(f"[green]✓[/green] Recorded result for {name}/{variant}")
+    _console().print(f"  Score: {score:.2f}")
     if output:
-        console.print(f"  Output: {output[:50]}..." if len(output) > 50 else f"  Output: {output}")
+        _console().print(f"  Output: {output[:50]}..." if len(output) > 50 else f"  Output: {output}")
 
 
 @ab_app.command("clear")
@@ -1349,11 +1600,7 @@ def ab_clear(
         "--yes", "-y",
         help="Skip confirmation",
     ),
-    project_dir: Optional[Path] = typer.Option(
-        None,
-        "--project", "-p",
-        help="Project root directory",
-    ),
+    project_dir: Optional[Path] = _PROJECT_OPTION,
 ) -> None:
     """
     Clear all records for an A/B test experiment.
@@ -1365,23 +1612,23 @@ def ab_clear(
     config = manager.get_experiment(name)
     
     if not config:
-        console.print(f"[red]Error:[/red] Experiment '{name}' not found")
+        _console().print(f"[red]Error:[/red] Experiment '{name}' not found")
         raise typer.Exit(1)
     
     storage = manager._get_storage()
     count = storage.get_record_count(name)
     
     if count == 0:
-        console.print(f"[yellow]No records to clear for '{name}'[/yellow]")
+        _console().print(f"[yellow]No records to clear for '{name}'[/yellow]")
         return
     
     if not yes:
         if not Confirm.ask(f"Clear {count} records for '{name}'?", default=False):
-            console.print("[dim]Cancelled[/dim]")
+            _console().print("[dim]Cancelled[/dim]")
             return
     
     cleared = storage.clear_records(name)
-    console.print(f"[green]✓[/green] Cleared {cleared} records for '{name}'")
+    _console().print(f"[green]✓[/green] Cleared {cleared} records for '{name}'")
 
 
 if __name__ == "__main__":
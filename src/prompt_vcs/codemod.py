@@ -2,8 +2,9 @@
 LibCST-based code migration tool for converting hardcoded prompts to p() calls.
 """
 
+import functools
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, Sequence
 
@@ -11,6 +12,7 @@ import libcst as cst
 
 from libcst.codemod import CodemodContext
 from libcst.codemod.visitors import AddImportsVisitor
+from libcst.helpers import get_absolute_module_from_package_for_import
 
 
 # Default variable name patterns that indicate a prompt
@@ -19,6 +21,20 @@ DEFAULT_PROMPT_VAR_PATTERNS = ["prompt", "template", "instruction", "msg"]
 # Minimum string length to consider for migration
 MIN_STRING_LENGTH = 10
 
+# Reused to render individual nodes back to source; parsing even an empty
+# module spins up libcst's tokenizer and parser, so do it only once
+_EMPTY_MODULE = cst.parse_module("")
+
+# Patterns used by sanitize_variable_name, compiled once at import
+_SINGLE_QUOTED_INDEX_RE = re.compile(r"\['([^']+)'\]")
+_DOUBLE_QUOTED_INDEX_RE = re.compile(r'\["([^"]+)"\]')
+_NUMERIC_INDEX_RE = re.compile(r"\[(\d+)\]")
+_NON_IDENTIFIER_RUN_RE = re.compile(r"[^a-zA-Z0-9]+")
+
+# What makes an f-string placeholder too complex to migrate: a call (a name
+# followed by "("), or an operator. Attribute and index access are allowed.
+_COMPLEX_EXPRESSION_RE = re.compile(r"\w\s*\(|[-+*/%<>]|[=!]=| and | or | not ")
+
 
 @dataclass
 class MigrationCandidate:
@@ -48,24 +64,17 @@ def sanitize_variable_name(expr: str) -> str:
         items[0] -> items_0
         x + 1 -> None (too complex, return original with underscores)
     """
-    # Replace attribute access (.)
-    result = expr.replace(".", "_")
-    
     # Replace string index access ['key'] or ["key"]
-    result = re.sub(r"\['([^']+)'\]", r"_\1", result)
-    result = re.sub(r'\["([^"]+)"\]', r"_\1", result)
+    result = _SINGLE_QUOTED_INDEX_RE.sub(r"_\1", expr)
+    result = _DOUBLE_QUOTED_INDEX_RE.sub(r"_\1", result)
     
     # Replace numeric index access [0], [1], etc.
-    result = re.sub(r"\[(\d+)\]", r"_\1", result)
-    
-    # Remove any remaining brackets
-    result = re.sub(r"[\[\]]", "_", result)
+    result = _NUMERIC_INDEX_RE.sub(r"_\1", result)
     
-    # Replace any non-identifier characters with underscore
-    result = re.sub(r"[^a-zA-Z0-9_]", "_", result)
-    
-    # Remove leading/trailing underscores and collapse multiple underscores
-    result = re.sub(r"_+", "_", result).strip("_")
+    # Dots, leftover brackets and any other non-identifier characters become
+    # underscores; runs (existing underscores included) collapse to one and
+    # the ends are trimmed
+    result = _NON_IDENTIFIER_RUN_RE.sub("_", result).strip("_")
     
     # Ensure it starts with a letter or underscore
     if result and result[0].isdigit():
@@ -80,17 +89,7 @@ def is_complex_expression(expr: str) -> bool:
     
     Complex expressions include function calls, operators, etc.
     """
-    # Check for function calls
-    if re.search(r"\w+\s*\(", expr):
-        return True
-    
-    # Check for operators (but allow attribute/index access)
-    operators = ["+", "-", "*", "/", "%", "==", "!=", "<", ">", " and ", " or ", " not "]
-    for op in operators:
-        if op in expr:
-            return True
-    
-    return False
+    return _COMPLEX_EXPRESSION_RE.search(expr) is not None
 
 
 class FStringExtractor(cst.CSTVisitor):
@@ -108,7 +107,7 @@ class FStringExtractor(cst.CSTVisitor):
     def visit_FormattedStringExpression(self, node: cst.FormattedStringExpression) -> None:
         """Visit expression parts of the f-string."""
         # Get the expression code
-        expr_code = cst.parse_module("").code_for_node(node.expression)
+        expr_code = _EMPTY_MODULE.code_for_node(node.expression)
         
         # Check for complex expressions
         if is_complex_expression(expr_code):
@@ -149,7 +148,9 @@ def extract_fstring_parts(fstring: cst.FormattedString) -> tuple[str, list[FStri
     Returns:
         Tuple of (template_string, parts, has_complex_expression)
     """
-    parts_list: list[FStringPart] = []
+    # Keyed by placeholder so a repeated expression becomes one kwarg; the
+    # first occurrence wins and dicts keep insertion order
+    parts_by_placeholder: dict[str, FStringPart] = {}
     template_parts: list[str] = []
     has_complex_expression = False
     
@@ -161,7 +162,7 @@ def extract_fstring_parts(fstring: cst.FormattedString) -> tuple[str, list[FStri
         elif isinstance(part, cst.FormattedStringExpression):
             # Expression part
             # Get the expression code
-            expr_code = cst.parse_module("").code_for_node(part.expression)
+            expr_code = _EMPTY_MODULE.code_for_node(part.expression)
             
             # Check for complex expressions
             if is_complex_expression(expr_code):
@@ -190,14 +191,15 @@ def extract_fstring_parts(fstring: cst.FormattedString) -> tuple[str, list[FStri
             full_placeholder = f"{{{placeholder}{conversion}{format_spec}}}"
             template_parts.append(full_placeholder)
             
-            parts_list.append(FStringPart(
-                placeholder=placeholder,
-                expression=expr_code,
-                format_spec=conversion + format_spec,
-            ))
+            if placeholder not in parts_by_placeholder:
+                parts_by_placeholder[placeholder] = FStringPart(
+                    placeholder=placeholder,
+                    expression=expr_code,
+                    format_spec=conversion + format_spec,
+                )
     
     template = "".join(template_parts)
-    return template, parts_list, has_complex_expression
+    return template, list(parts_by_placeholder.values()), has_complex_expression
 
 
 def get_string_content(node: cst.BaseExpression) -> Optional[str]:
@@ -251,6 +253,9 @@ class PromptMigrator(cst.CSTTransformer):
         self._written_yamls: list[Path] = []  # Track written YAML files
         self._single_file_mode: bool = False  # Whether to use single-file mode
         self._pending_prompts: dict[str, dict] = {}  # Prompts to write in single-file mode
+        self._has_p_import = False  # 'from prompt_vcs import p' (or *) seen
+        self._prompt_vcs_import: Optional[cst.ImportFrom] = None  # First import to extend with p
+        self.import_handled = False  # leave_Module already settled the p import
         
         # Build list of patterns to match
         self._patterns = list(DEFAULT_PROMPT_VAR_PATTERNS)
@@ -313,15 +318,10 @@ class PromptMigrator(cst.CSTTransformer):
                            If False, only include prompt_id and kwargs (clean mode).
         """
         # Build kwargs
+        # Placeholders are unique: extract_fstring_parts() already merged repeats
         kwarg_nodes = []
-        seen_placeholders: set[str] = set()
         
         for part in kwargs:
-            # Skip duplicate placeholders
-            if part.placeholder in seen_placeholders:
-                continue
-            seen_placeholders.add(part.placeholder)
-            
             # Parse the original expression
             try:
                 expr = cst.parse_expression(part.expression)
@@ -466,6 +466,31 @@ class PromptMigrator(cst.CSTTransformer):
         self._pending_prompts.clear()
         return count
     
+    def on_visit(self, node: cst.CSTNode) -> bool:
+        # Assignments and imports are statements, so nothing below an
+        # expression can be rewritten; skip descending into it
+        if isinstance(node, cst.BaseExpression):
+            return False
+        return super().on_visit(node)
+    
+    def leave_ImportFrom(
+        self,
+        original_node: cst.ImportFrom,
+        updated_node: cst.ImportFrom,
+    ) -> cst.ImportFrom:
+        """Record existing prompt_vcs imports so leave_Module can add p."""
+        if get_absolute_module_from_package_for_import(None, original_node) != "prompt_vcs":
+            return updated_node
+        
+        names = original_node.names
+        if isinstance(names, cst.ImportStar):
+            self._has_p_import = True
+        elif any(alias.asname is None and alias.evaluated_name == "p" for alias in names):
+            self._has_p_import = True
+        elif self._prompt_vcs_import is None:
+            self._prompt_vcs_import = original_node
+        return updated_node
+    
     def leave_Assign(
         self,
         original_node: cst.Assign,
@@ -506,9 +531,9 @@ class PromptMigrator(cst.CSTTransformer):
                 new_call = self._build_p_call(prompt_id, template, parts)
             
             # Record the candidate
-            original_code = cst.parse_module("").code_for_node(original_node)
+            original_code = _EMPTY_MODULE.code_for_node(original_node)
             new_node = updated_node.with_changes(value=new_call)
-            new_code = cst.parse_module("").code_for_node(new_node)
+            new_code = _EMPTY_MODULE.code_for_node(new_node)
             
             # Get line number
             pos = self.get_metadata(cst.metadata.PositionProvider, original_node, None)
@@ -548,9 +573,9 @@ class PromptMigrator(cst.CSTTransformer):
                 new_call = self._build_p_call(prompt_id, content, [])
             
             # Record the candidate
-            original_code = cst.parse_module("").code_for_node(original_node)
+            original_code = _EMPTY_MODULE.code_for_node(original_node)
             new_node = updated_node.with_changes(value=new_call)
-            new_code = cst.parse_module("").code_for_node(new_node)
+            new_code = _EMPTY_MODULE.code_for_node(new_node)
             
             pos = self.get_metadata(cst.metadata.PositionProvider, original_node, None)
             line_number = pos.start.line if pos else 0
@@ -587,9 +612,9 @@ class PromptMigrator(cst.CSTTransformer):
             else:
                 new_call = self._build_p_call(prompt_id, content, [])
             
-            original_code = cst.parse_module("").code_for_node(original_node)
+            original_code = _EMPTY_MODULE.code_for_node(original_node)
             new_node = updated_node.with_changes(value=new_call)
-            new_code = cst.parse_module("").code_for_node(new_node)
+            new_code = _EMPTY_MODULE.code_for_node(new_node)
             
             pos = self.get_metadata(cst.metadata.PositionProvider, original_node, None)
             line_number = pos.start.line if pos else 0
@@ -608,6 +633,90 @@ class PromptMigrator(cst.CSTTransformer):
             return new_node
         
         return updated_node
+    
+    def leave_Module(self, original_node: cst.Module, updated_node: cst.Module) -> cst.Module:
+        """
+        Add 'from prompt_vcs import p' in the same pass as the rewrite.
+        
+        Mirrors AddImportsVisitor: p is merged into an existing
+        'from prompt_vcs import ...', otherwise a new import goes after the
+        last top-level import (or the docstring / __strict__ flag).
+        """
+        if not (self.apply_changes and self.needs_import):
+            return updated_node
+        if self._has_p_import:
+            self.import_handled = True
+            return updated_node
+        
+        body = list(updated_node.body)
+        if self._prompt_vcs_import is not None:
+            # Only top-level imports can be patched here; anything nested is
+            # left to add_import_if_needed
+            for i, statement in enumerate(original_node.body):
+                if not isinstance(statement, cst.SimpleStatementLine):
+                    continue
+                for j, small in enumerate(statement.body):
+                    if small is self._prompt_vcs_import:
+                        line = body[i]
+                        import_from = line.body[j]
+                        merged = import_from.with_changes(
+                            names=[cst.ImportAlias(name=cst.Name("p")), *import_from.names]
+                        )
+                        body[i] = line.with_changes(
+                            body=[*line.body[:j], merged, *line.body[j + 1:]]
+                        )
+                        self.import_handled = True
+                        return updated_node.with_changes(body=body)
+            return updated_node
+        
+        header_end = insert_at = 0
+        if original_node.body and _is_strict_flag(original_node.body[0]):
+            header_end = insert_at = 1
+        for i, statement in enumerate(original_node.body):
+            if i == 0 and _is_docstring(statement):
+                header_end = insert_at = 1
+            elif isinstance(statement, cst.SimpleStatementLine) and any(
+                isinstance(small, (cst.Import, cst.ImportFrom)) for small in statement.body
+            ):
+                insert_at = i + 1
+        
+        # Keep at least one empty line between the imports and the code after
+        rest = body[insert_at:]
+        if rest:
+            leading = rest[0].leading_lines
+            if not leading or leading[0].comment is not None:
+                rest[0] = rest[0].with_changes(leading_lines=(cst.EmptyLine(), *leading))
+        
+        import_line = cst.parse_statement(
+            "from prompt_vcs import p", config=updated_node.config_for_parsing
+        )
+        self.import_handled = True
+        return updated_node.with_changes(
+            body=[*body[:insert_at], import_line, *rest]
+        )
+
+
+def _is_docstring(statement: cst.BaseStatement) -> bool:
+    """Check whether a module-level statement is a plain string expression."""
+    return (
+        isinstance(statement, cst.SimpleStatementLine)
+        and len(statement.body) == 1
+        and isinstance(statement.body[0], cst.Expr)
+        and isinstance(statement.body[0].value, cst.SimpleString)
+    )
+
+
+def _is_strict_flag(statement: cst.BaseStatement) -> bool:
+    """Check whether a statement is a bare '__strict__ = ...' assignment."""
+    if not (isinstance(statement, cst.SimpleStatementLine) and len(statement.body) == 1):
+        return False
+    assign = statement.body[0]
+    return (
+        isinstance(assign, cst.Assign)
+        and len(assign.targets) == 1
+        and isinstance(assign.targets[0].target, cst.Name)
+        and assign.targets[0].target.value == "__strict__"
+    )
 
 
 def add_import_if_needed(tree: cst.Module, needs_import: bool) -> cst.Module:
@@ -625,6 +734,187 @@ def add_import_if_needed(tree: cst.Module, needs_import: bool) -> cst.Module:
     return modified_tree
 
 
+@functools.lru_cache(maxsize=None)
+def _candidate_hint_re(patterns: tuple[str, ...]) -> "re.Pattern[str]":
+    """Compile one case-insensitive alternation over lowercased ASCII patterns."""
+    return re.compile("|".join(map(re.escape, patterns)), re.IGNORECASE)
+
+
+def _may_contain_candidates(content: str, extra_patterns: Optional[list[str]]) -> bool:
+    """
+    Cheap check that some name in ``content`` could match a prompt pattern.
+    
+    PromptMigrator only rewrites assignments whose target name contains a
+    pattern after str.lower(), so text without any pattern can be skipped
+    before paying for a libcst parse. This must never reject text the
+    migrator would accept: for ASCII patterns a Unicode IGNORECASE regex is
+    a superset of that test (it also folds e.g. the Kelvin sign and dotted
+    I), and scans the text without copying it; other patterns fall back to
+    comparing against a lowered copy.
+    """
+    patterns = tuple(
+        pattern.lower() for pattern in DEFAULT_PROMPT_VAR_PATTERNS + (extra_patterns or [])
+    )
+    if all(pattern.isascii() for pattern in patterns):
+        return _candidate_hint_re(patterns).search(content) is not None
+    
+    lowered = content.lower()
+    return any(pattern in lowered for pattern in patterns)
+
+
+def _run_migrator(
+    wrapper: cst.metadata.MetadataWrapper,
+    content: str,
+    filename: str,
+    apply_changes: bool,
+    clean_mode: bool,
+    project_root: Optional[Path],
+    extra_patterns: Optional[list[str]],
+    approved_prompt_ids: Optional[set[str]],
+    allow_writes: bool,
+) -> tuple[str, list[MigrationCandidate]]:
+    """Run PromptMigrator over an already parsed module."""
+    migrator = PromptMigrator(
+        filename,
+        clean_mode=clean_mode,
+        project_root=project_root,
+        extra_patterns=extra_patterns,
+        approved_prompt_ids=approved_prompt_ids,
+        allow_writes=allow_writes,
+        apply_changes=apply_changes,
+    )
+    
+    if apply_changes:
+        # Actually apply the transformation
+        modified_tree = wrapper.visit(migrator)
+        
+        # Add import if needed and the transform could not place it itself
+        if migrator.needs_import and not migrator.import_handled:
+            modified_tree = add_import_if_needed(modified_tree, True)
+        
+        # In clean mode with single-file, flush pending prompts to prompts.yaml
+        if clean_mode and allow_writes:
+            migrator.flush_pending_prompts()
+        
+        return modified_tree.code, migrator.candidates
+    else:
+        # Just collect candidates without modifying
+        wrapper.visit(migrator)
+        return content, migrator.candidates
+
+
+@dataclass
+class MigrationPlan:
+    """
+    Migration candidates found in a file, together with its parsed tree.
+    
+    Created by plan_file_migration(). apply() reuses the parsed module (and,
+    within the same process, its resolved position metadata), so applying
+    approved candidates does not parse the file a second time.
+    """
+    content: str
+    filename: str
+    candidates: list[MigrationCandidate]
+    clean_mode: bool = False
+    project_root: Optional[Path] = None
+    extra_patterns: Optional[list[str]] = None
+    _module: Optional[cst.Module] = field(default=None, repr=False, compare=False)
+    _wrapper: Optional[cst.metadata.MetadataWrapper] = field(default=None, repr=False, compare=False)
+    
+    def __getstate__(self) -> dict:
+        # Resolved metadata is not picklable; keep the parsed module when the
+        # plan crosses a process boundary and re-resolve positions on apply().
+        state = self.__dict__.copy()
+        state["_wrapper"] = None
+        return state
+    
+    def apply(
+        self,
+        approved_prompt_ids: Optional[set[str]] = None,
+        allow_writes: bool = True,
+    ) -> tuple[str, list[MigrationCandidate]]:
+        """
+        Apply the planned migrations.
+        
+        Args:
+            approved_prompt_ids: Optional set of prompt IDs to apply (others will be skipped)
+            allow_writes: Allow filesystem writes (YAML) when clean_mode is True
+            
+        Returns:
+            Tuple of (modified_content, applied_candidates)
+        """
+        if self._wrapper is None:
+            module = self._module if self._module is not None else cst.parse_module(self.content)
+            self._wrapper = cst.metadata.MetadataWrapper(module, unsafe_skip_copy=True)
+        
+        return _run_migrator(
+            self._wrapper,
+            self.content,
+            self.filename,
+            apply_changes=True,
+            clean_mode=self.clean_mode,
+            project_root=self.project_root,
+            extra_patterns=self.extra_patterns,
+            approved_prompt_ids=approved_prompt_ids,
+            allow_writes=allow_writes,
+        )
+
+
+def plan_file_migration(
+    content: str,
+    filename: str,
+    clean_mode: bool = False,
+    project_root: Optional[Path] = None,
+    extra_patterns: Optional[list[str]] = None,
+) -> MigrationPlan:
+    """
+    Parse file content once and collect migration candidates without applying them.
+    
+    Args:
+        content: The file content
+        filename: The filename (used for generating IDs)
+        clean_mode: If True, candidates are built as p() calls without default content
+        project_root: Project root directory for writing YAML files (required for clean_mode)
+        extra_patterns: Additional variable name patterns to match
+        
+    Returns:
+        MigrationPlan whose apply() performs the migration without reparsing
+    """
+    if not _may_contain_candidates(content, extra_patterns):
+        return MigrationPlan(
+            content=content,
+            filename=filename,
+            candidates=[],
+            clean_mode=clean_mode,
+            project_root=project_root,
+            extra_patterns=extra_patterns,
+        )
+    
+    wrapper = cst.metadata.MetadataWrapper(cst.parse_module(content), unsafe_skip_copy=True)
+    _, candidates = _run_migrator(
+        wrapper,
+        content,
+        filename,
+        apply_changes=False,
+        clean_mode=clean_mode,
+        project_root=project_root,
+        extra_patterns=extra_patterns,
+        approved_prompt_ids=None,
+        allow_writes=False,
+    )
+    
+    return MigrationPlan(
+        content=content,
+        filename=filename,
+        candidates=candidates,
+        clean_mode=clean_mode,
+        project_root=project_root,
+        extra_patterns=extra_patterns,
+        _module=wrapper.module,
+        _wrapper=wrapper,
+    )
+
+
 def migrate_file_content(
     content: str,
     filename: str,
@@ -651,40 +941,28 @@ def migrate_file_content(
     Returns:
         Tuple of (modified_content, candidates)
     """
+    # Without a matching name there is nothing to rewrite; libcst would
+    # round-trip the content unchanged
+    if not _may_contain_candidates(content, extra_patterns):
+        return content, []
+    
     # Parse the module with metadata
-    wrapper = cst.metadata.MetadataWrapper(cst.parse_module(content))
+    wrapper = cst.metadata.MetadataWrapper(cst.parse_module(content), unsafe_skip_copy=True)
     
-    # Create and run the migrator
     if allow_writes is None:
         allow_writes = apply_changes
 
-    migrator = PromptMigrator(
+    return _run_migrator(
+        wrapper,
+        content,
         filename,
+        apply_changes=apply_changes,
         clean_mode=clean_mode,
         project_root=project_root,
         extra_patterns=extra_patterns,
         approved_prompt_ids=approved_prompt_ids,
         allow_writes=allow_writes,
-        apply_changes=apply_changes,
     )
-    
-    if apply_changes:
-        # Actually apply the transformation
-        modified_tree = wrapper.visit(migrator)
-        
-        # Add import if needed
-        if migrator.needs_import:
-            modified_tree = add_import_if_needed(modified_tree, True)
-        
-        # In clean mode with single-file, flush pending prompts to prompts.yaml
-        if clean_mode and allow_writes:
-            migrator.flush_pending_prompts()
-        
-        return modified_tree.code, migrator.candidates
-    else:
-        # Just collect candidates without modifying
-        wrapper.visit(migrator)
-        return content, migrator.candidates
 
 
 def migrate_file(
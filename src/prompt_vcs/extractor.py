@@ -6,7 +6,7 @@ import ast
 import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
 
 
 @dataclass
@@ -34,6 +34,11 @@ class PromptIdConflictError(Exception):
         super().__init__(message)
 
 
+# Callee names recognised as prompt definitions
+_P_CALL_NAMES = frozenset({"p"})
+_PROMPT_DECORATOR_NAME = "prompt"
+
+
 class PromptExtractor(ast.NodeVisitor):
     """
     AST visitor that extracts prompt definitions from Python source code.
@@ -53,13 +58,20 @@ class PromptExtractor(ast.NodeVisitor):
     
     def visit_Call(self, node: ast.Call) -> None:
         """Visit function calls to find p() invocations."""
-        # Check if this is a call to p()
-        if isinstance(node.func, ast.Name) and node.func.id == "p":
+        # Check if this is a call to p(); exact type checks skip the MRO walk
+        func = node.func
+        if type(func) is ast.Name and func.id in _P_CALL_NAMES:
             self._extract_p_call(node)
         
         # Continue visiting children
         self.generic_visit(node)
     
+    def visit_Name(self, node: ast.Name) -> None:
+        """Names are leaves (apart from their ctx); nothing to extract."""
+    
+    def visit_Constant(self, node: ast.Constant) -> None:
+        """Constants are leaves; skip NodeVisitor's legacy visit_Str/visit_Num shim."""
+    
     def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
         """Visit function definitions to find @prompt decorators."""
         for decorator in node.decorator_list:
@@ -133,11 +145,11 @@ class PromptExtractor(ast.NodeVisitor):
             func_node = decorator.func
             
             # Check for @prompt(...) or @module.prompt(...)
-            is_prompt = False
-            if isinstance(func_node, ast.Name) and func_node.id == "prompt":
-                is_prompt = True
-            elif isinstance(func_node, ast.Attribute) and func_node.attr == "prompt":
-                is_prompt = True
+            func_type = type(func_node)
+            is_prompt = (
+                (func_type is ast.Name and func_node.id == _PROMPT_DECORATOR_NAME)
+                or (func_type is ast.Attribute and func_node.attr == _PROMPT_DECORATOR_NAME)
+            )
             
             if not is_prompt:
                 return
@@ -214,33 +226,56 @@ def extract_prompts_from_directory(
         yield from extract_prompts_from_file(py_file)
 
 
+def collect_unique_prompts(
+    prompts: Iterable[ExtractedPrompt],
+) -> dict[str, ExtractedPrompt]:
+    """
+    Deduplicate prompts by ID while checking for conflicts in the same pass.
+    
+    The first occurrence of each ID is kept. Works on any iterable, so it can
+    consume extract_prompts_from_directory() lazily without building a list.
+    
+    Args:
+        prompts: Extracted prompts, in discovery order
+        
+    Returns:
+        Dictionary mapping prompt IDs to their first occurrence
+        
+    Raises:
+        PromptIdConflictError: If an ID is seen again with different content;
+            the error lists every location of the first conflicting ID
+    """
+    unique: dict[str, ExtractedPrompt] = {}
+    repeats: dict[str, list[ExtractedPrompt]] = {}
+    conflicting: set[str] = set()
+    for prompt in prompts:
+        first = unique.setdefault(prompt.id, prompt)
+        if first is not prompt:
+            repeats.setdefault(prompt.id, []).append(prompt)
+            if first.default_content != prompt.default_content:
+                conflicting.add(prompt.id)
+    
+    if conflicting:
+        prompt_id = next(pid for pid in unique if pid in conflicting)
+        group = [unique[prompt_id], *repeats[prompt_id]]
+        raise PromptIdConflictError(
+            prompt_id,
+            [(p.source_file, p.line_number, p.default_content) for p in group],
+        )
+    return unique
+
+
 def check_id_conflicts(prompts: list[ExtractedPrompt]) -> None:
     """
     Check for prompt ID conflicts (same ID with different content).
     
+    Kept for backwards compatibility; prefer collect_unique_prompts(), which
+    also returns the deduplicated prompts.
+    
     Args:
         prompts: List of extracted prompts
         
     Raises:
         PromptIdConflictError: If conflicts are found
     """
-    # Group by ID
-    by_id: dict[str, list[ExtractedPrompt]] = {}
-    for prompt in prompts:
-        if prompt.id not in by_id:
-            by_id[prompt.id] = []
-        by_id[prompt.id].append(prompt)
-    
-    # Check for conflicts
-    for prompt_id, group in by_id.items():
-        if len(group) <= 1:
-            continue
-        
-        # Check if all have the same content
-        contents = set(p.default_content for p in group)
-        if len(contents) > 1:
-            locations = [
-                (p.source_file, p.line_number, p.default_content)
-                for p in group
-            ]
-            raise PromptIdConflictError(prompt_id, locations)
+    collect_unique_prompts(prompts)
@@ -4,13 +4,21 @@ Core prompt manager: handles lockfile loading and prompt resolution.
 
 import inspect
 import json
+import os
+import stat
 import warnings
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional
 
 from prompt_vcs.templates import load_yaml_template, load_prompts_file, render_template
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 
 # Lockfile and prompts file/directory names
 LOCKFILE_NAME = ".prompt_lock.json"
@@ -18,6 +26,181 @@ PROMPTS_FILE = "prompts.yaml"  # Single-file mode
 PROMPTS_DIR = "prompts"  # Multi-file mode
 
 
+def read_lockfile(path: Path) -> dict[str, str]:
+    """
+    Read and parse a lockfile in a single buffered read.
+    
+    Uses orjson when installed, otherwise the stdlib json module.
+    
+    Args:
+        path: Path to the lockfile
+        
+    Returns:
+        Dictionary mapping prompt IDs to version strings
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    data = path.read_bytes()
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_lockfile(path: Path, lockfile: dict[str, str]) -> None:
+    """
+    Serialize a lockfile with 2-space indentation and replace it atomically.
+    
+    Uses orjson when installed, otherwise the stdlib json module. The data is
+    written to a sibling temporary file, synced, and renamed over ``path``, so
+    readers never see a truncated lockfile if the process is interrupted. An
+    existing lockfile keeps its permissions, and a symlinked lockfile is
+    updated through the link rather than replaced by a regular file.
+    
+    Args:
+        path: Path to the lockfile
+        lockfile: Dictionary mapping prompt IDs to version strings
+    """
+    if HAS_ORJSON:
+        data = orjson.dumps(lockfile, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(lockfile, indent=2, ensure_ascii=False).encode("utf-8")
+    
+    # Replace the link's target so the symlink itself survives the rename
+    target = Path(os.path.realpath(path))
+    try:
+        mode: Optional[int] = stat.S_IMODE(os.stat(target).st_mode)
+    except FileNotFoundError:
+        mode = None
+    
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ProjectInfo(NamedTuple):
+    """
+    A project root plus which well-known entries it contains.
+    
+    A snapshot taken when the lookup ran; find_project() and
+    inspect_project() build a fresh one on every call.
+    """
+    root: Path
+    has_git: bool
+    has_lockfile: bool
+    has_prompts_file: bool
+
+
+# Entries recorded in ProjectInfo, gathered while looking for root markers
+_PROJECT_ENTRIES = frozenset({".git", LOCKFILE_NAME, PROMPTS_FILE})
+
+
+def _project_entries(directory: Path, names: frozenset[str]) -> Optional[frozenset[str]]:
+    """
+    Return which of ``names`` exist in ``directory`` using one directory listing.
+    
+    Returns None if the directory cannot be listed.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(entry.name for entry in it if entry.name in names)
+    except OSError:
+        return None
+
+
+def inspect_project(root: Path) -> ProjectInfo:
+    """
+    Describe a known project root without searching upward.
+    
+    Args:
+        root: Project root directory
+        
+    Returns:
+        ProjectInfo for ``root``
+    """
+    found = _project_entries(root, _PROJECT_ENTRIES)
+    if found is None:
+        # Searchable but unlistable directories can still be probed directly
+        found = frozenset(n for n in _PROJECT_ENTRIES if os.path.lexists(os.path.join(root, n)))
+    return ProjectInfo(
+        root=root,
+        has_git=".git" in found,
+        has_lockfile=LOCKFILE_NAME in found,
+        has_prompts_file=PROMPTS_FILE in found,
+    )
+
+
+def find_project(
+    start: Path,
+    markers: tuple[str, ...] = (LOCKFILE_NAME, ".git"),
+) -> Optional[ProjectInfo]:
+    """
+    Find the nearest directory at or above ``start`` containing any marker.
+    
+    Each level is listed once; the same listing also records whether the
+    root holds .git, the lockfile and prompts.yaml, so callers need not stat
+    them again. Nothing is cached: the directory tree can change between
+    calls (``chdir``, ``pvcs init``, ``git init``), so every call rescans.
+    
+    Args:
+        start: Directory to start searching from
+        markers: File or directory names that identify a project root
+        
+    Returns:
+        ProjectInfo for the project root, or None if not found
+    """
+    current = start.resolve()
+    names = _PROJECT_ENTRIES.union(markers)
+    for directory in (current, *current.parents):
+        found = _project_entries(directory, names)
+        if found is None:
+            # Searchable but unlistable directories can still be probed directly
+            if any(os.path.lexists(os.path.join(directory, m)) for m in markers):
+                return inspect_project(directory)
+        elif not found.isdisjoint(markers):
+            return ProjectInfo(
+                root=directory,
+                has_git=".git" in found,
+                has_lockfile=LOCKFILE_NAME in found,
+                has_prompts_file=PROMPTS_FILE in found,
+            )
+    return None
+
+
+def find_project_root(
+    start: Path,
+    markers: tuple[str, ...] = (LOCKFILE_NAME, ".git"),
+) -> Optional[Path]:
+    """
+    Find the nearest directory at or above ``start`` containing any marker.
+    
+    Thin wrapper over ``find_project()``.
+    
+    Args:
+        start: Directory to start searching from
+        markers: File or directory names that identify a project root
+        
+    Returns:
+        Path to project root, or None if not found
+    """
+    info = find_project(start, markers)
+    return info.root if info is not None else None
+
+
 @dataclass
 class PromptDefinition:
     """Represents a prompt definition extracted from code."""
@@ -44,6 +227,7 @@ class PromptManager:
     _registry: dict[str, PromptDefinition] = field(default_factory=dict)
     _prompts_cache: dict[str, dict] = field(default_factory=dict)  # Cache for single-file mode
     _prompts_cache_loaded: bool = False
+    _template_cache: dict[Path, tuple[tuple[int, int], Optional[str]]] = field(default_factory=dict)  # Multi-file mode
     
     def find_project_root(self, start_path: Optional[Path] = None) -> Optional[Path]:
         """
@@ -78,25 +262,9 @@ class PromptManager:
             finally:
                 del frame
         
-        current = start_path.resolve()
-        
-        # Search upward
-        while current != current.parent:
-            # Check for lockfile
-            if (current / LOCKFILE_NAME).exists():
-                return current
-            # Check for .git directory
-            if (current / ".git").exists():
-                return current
-            current = current.parent
-        
-        # Check root directory as well
-        if (current / LOCKFILE_NAME).exists():
-            return current
-        if (current / ".git").exists():
-            return current
-            
-        return None
+        # Module-level helper: one directory listing per level, rescanned on
+        # every call so chdir and newly created projects are picked up
+        return find_project_root(start_path)
     
     def load_lockfile(self, force: bool = False) -> dict[str, str]:
         """
@@ -119,16 +287,10 @@ class PromptManager:
             self._lockfile_loaded = True
             return self._lockfile
         
-        lockfile_path = self._project_root / LOCKFILE_NAME
-        
-        if not lockfile_path.exists():
-            self._lockfile = {}
-            self._lockfile_loaded = True
-            return self._lockfile
-        
+        # A missing lockfile surfaces as FileNotFoundError (an IOError), so
+        # there is no need to stat it first
         try:
-            with open(lockfile_path, "r", encoding="utf-8") as f:
-                self._lockfile = json.load(f)
+            self._lockfile = read_lockfile(self._project_root / LOCKFILE_NAME)
         except (json.JSONDecodeError, IOError):
             self._lockfile = {}
         
@@ -151,10 +313,7 @@ class PromptManager:
         if self._project_root is None:
             raise RuntimeError("Cannot save lockfile: project root not found")
         
-        lockfile_path = self._project_root / LOCKFILE_NAME
-        
-        with open(lockfile_path, "w", encoding="utf-8") as f:
-            json.dump(self._lockfile, f, indent=2, ensure_ascii=False)
+        write_lockfile(self._project_root / LOCKFILE_NAME, self._lockfile)
     
     def register_prompt(self, definition: PromptDefinition) -> None:
         """
@@ -217,6 +376,37 @@ class PromptManager:
         self._prompts_cache_loaded = True
         return self._prompts_cache
     
+    def _load_version_template(self, yaml_path: Path) -> Optional[str]:
+        """
+        Return the template stored in a multi-file mode version file.
+        
+        Parses are reused while the file's mtime and size are unchanged, so
+        repeated get_prompt() calls cost one stat() instead of a YAML load,
+        yet edits made while the process runs are still picked up.
+        
+        Args:
+            yaml_path: Path to prompts/{id}/{version}.yaml
+            
+        Returns:
+            The template string, or None if the file is missing or invalid
+        """
+        try:
+            st = os.stat(yaml_path)
+        except OSError:
+            return None
+        
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._template_cache.get(yaml_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        try:
+            template = load_yaml_template(yaml_path)["template"]
+        except Exception:
+            template = None
+        self._template_cache[yaml_path] = (key, template)
+        return template
+    
     def get_prompt(
         self,
         prompt_id: str,
@@ -298,24 +488,15 @@ class PromptManager:
                 version = lockfile[prompt_id]
                 
                 if self._project_root:
-                    yaml_path = self._project_root / PROMPTS_DIR / prompt_id / f"{version}.yaml"
-                    
-                    if yaml_path.exists():
-                        try:
-                            data = load_yaml_template(yaml_path)
-                            template = data["template"]
-                        except Exception:
-                            pass
+                    template = self._load_version_template(
+                        self._project_root / PROMPTS_DIR / prompt_id / f"{version}.yaml"
+                    )
             
             # If not found in lockfile, try to load default v1.yaml
             if template is None and self._project_root:
-                yaml_path = self._project_root / PROMPTS_DIR / prompt_id / "v1.yaml"
-                if yaml_path.exists():
-                    try:
-                        data = load_yaml_template(yaml_path)
-                        template = data["template"]
-                    except Exception:
-                        pass
+                template = self._load_version_template(
+                    self._project_root / PROMPTS_DIR / prompt_id / "v1.yaml"
+                )
         
         # Fall back to default_content
         if template is None:
@@ -344,6 +525,7 @@ class PromptManager:
         self._lockfile_loaded = False  # Force reload
         self._prompts_cache = {}  # Clear cached prompts
         self._prompts_cache_loaded = False
+        self._template_cache = {}
     
     @property
     def project_root(self) -> Optional[Path]:
@@ -2,17 +2,29 @@
 Jinja2 template rendering utilities.
 """
 
+import functools
+import mmap
+import os
+import warnings
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Union
 
 import yaml
-from jinja2 import StrictUndefined
-from jinja2.sandbox import SandboxedEnvironment
 
+if TYPE_CHECKING:
+    from jinja2.sandbox import SandboxedEnvironment
 
-# Create a sandboxed Jinja2 environment for safe template rendering
-# SandboxedEnvironment prevents access to private attributes and dangerous methods
-_env = SandboxedEnvironment(undefined=StrictUndefined)
+# Prefer the libyaml-backed loader/dumper; the pure-Python ones are much slower
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+    warnings.warn(
+        "PyYAML was built without libyaml; falling back to the pure-Python "
+        "YAML loader. Install libyaml for faster prompt file handling.",
+        RuntimeWarning,
+    )
 
 
 def _pyformat(value: Any, spec: str) -> str:
@@ -20,10 +32,56 @@ def _pyformat(value: Any, spec: str) -> str:
     return format(value, spec)
 
 
-_env.filters["pyformat"] = _pyformat
-_env.filters["pyrepr"] = repr
-_env.filters["pystr"] = str
-_env.filters["pyascii"] = ascii
+@functools.cache
+def _get_env() -> "SandboxedEnvironment":
+    """
+    Return the shared Jinja2 environment, importing Jinja2 on first use.
+    
+    SandboxedEnvironment prevents access to private attributes and dangerous methods.
+    """
+    from jinja2 import StrictUndefined
+    from jinja2.sandbox import SandboxedEnvironment
+
+    env = SandboxedEnvironment(undefined=StrictUndefined)
+    env.filters["pyformat"] = _pyformat
+    env.filters["pyrepr"] = repr
+    env.filters["pystr"] = str
+    env.filters["pyascii"] = ascii
+    return env
+
+
+# Files above this size are memory-mapped rather than read into a new buffer
+_MMAP_THRESHOLD = 4096
+
+
+def _load_yaml_file(path: Path) -> Any:
+    """
+    Parse a YAML file with the safe loader, letting libyaml decode the bytes.
+    
+    Small files are handed over as the open binary file, so parse errors name
+    it. Large files are memory-mapped, and the path is written into the error
+    marks, which would otherwise say ``<file>``.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= _MMAP_THRESHOLD:
+            return yaml.load(f, Loader=SafeLoader)
+        
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as buf:
+            try:
+                return yaml.load(buf, Loader=SafeLoader)
+            except yaml.MarkedYAMLError as e:
+                # libyaml's marks are read-only, so rebuild them with the path
+                if e.problem_mark is not None:
+                    e.problem_mark = _named_mark(e.problem_mark, path)
+                if e.context_mark is not None:
+                    e.context_mark = _named_mark(e.context_mark, path)
+                raise
+
+
+def _named_mark(mark: yaml.Mark, path: Path) -> yaml.Mark:
+    """Copy a YAML error mark, naming the file it points into."""
+    return yaml.Mark(str(path), mark.index, mark.line, mark.column, None, None)
 
 
 def render_template(template_str: str, **kwargs: Any) -> str:
@@ -68,7 +126,7 @@ def render_template(template_str: str, **kwargs: Any) -> str:
         return converted.replace("\x00\x00", "{{").replace("\x01\x01", "}}")
 
     jinja_template = convert_simple_placeholder(template_str)
-    template = _env.from_string(jinja_template)
+    template = _get_env().from_string(jinja_template)
     return template.render(**kwargs)
 
 
@@ -92,8 +150,7 @@ def load_yaml_template(path: Path) -> dict[str, Any]:
         FileNotFoundError: If the file doesn't exist
         yaml.YAMLError: If the file is not valid YAML
     """
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+    data = _load_yaml_file(path)
     
     # Validate required fields
     if not isinstance(data, dict):
@@ -109,6 +166,38 @@ def load_yaml_template(path: Path) -> dict[str, Any]:
     }
 
 
+def dump_yaml_template(
+    template: str,
+    version: str = "v1",
+    description: str = "",
+) -> bytes:
+    """
+    Serialize a prompt template to UTF-8 encoded YAML.
+    
+    Args:
+        template: The template string
+        version: Version identifier
+        description: Description of the prompt
+        
+    Returns:
+        YAML document as bytes, ready to be written in a single call
+    """
+    data = {
+        "version": version,
+        "description": description,
+        "template": template,
+    }
+    
+    return yaml.dump(
+        data,
+        Dumper=SafeDumper,
+        allow_unicode=True,
+        default_flow_style=False,
+        sort_keys=False,
+        encoding="utf-8",
+    )
+
+
 def save_yaml_template(
     path: Path,
     template: str,
@@ -127,14 +216,54 @@ def save_yaml_template(
     # Ensure parent directory exists
     path.parent.mkdir(parents=True, exist_ok=True)
     
-    data = {
-        "version": version,
-        "description": description,
-        "template": template,
-    }
+    path.write_bytes(dump_yaml_template(template, version, description))
+
+
+def create_yaml_template(
+    path: Union[str, Path],
+    template: str,
+    version: str = "v1",
+    description: str = "",
+) -> bool:
+    """
+    Create a prompt template YAML file, leaving any existing file untouched.
     
-    with open(path, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    Uses an exclusive open instead of a separate existence check, so the
+    check and the write happen in one syscall.
+    
+    Args:
+        path: Path to save the YAML file
+        template: The template string
+        version: Version identifier
+        description: Description of the prompt
+        
+    Returns:
+        True if the file was created, False if it already existed
+    """
+    # Ensure parent directory exists
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    
+    # Serialize first so a dump error cannot leave an empty file behind
+    data = dump_yaml_template(template, version, description)
+    
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    except FileExistsError:
+        return False
+    
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+    except BaseException:
+        # Don't leave a truncated file that later runs would skip as existing
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+    return True
 
 
 def load_prompts_file(path: Path) -> dict[str, dict]:
@@ -162,8 +291,7 @@ def load_prompts_file(path: Path) -> dict[str, dict]:
         FileNotFoundError: If the file doesn't exist
         yaml.YAMLError: If the file is not valid YAML
     """
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+    data = _load_yaml_file(path)
     
     if data is None:
         return {}
@@ -232,5 +360,12 @@ def save_prompts_file(path: Path, prompts: dict[str, dict]) -> None:
         data[prompt_id] = entry
     
     with open(path, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        yaml.dump(
+            data,
+            f,
+            Dumper=SafeDumper,
+            allow_unicode=True,
+            default_flow_style=False,
+            sort_keys=False,
+        )
 
@@ -10,6 +10,7 @@ from typing import Any, Optional
 import yaml
 
 from prompt_vcs.manager import get_manager
+from prompt_vcs.templates import SafeDumper, SafeLoader
 from prompt_vcs.validator import PromptValidator, create_validator_from_yaml
 
 
@@ -289,7 +290,7 @@ def load_test_suite_from_yaml(path: Path) -> TestSuite:
         ValueError: If the YAML format is invalid
     """
     with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=SafeLoader)
 
     if not isinstance(data, dict):
         raise ValueError(f"Invalid test suite format in {path}: expected a dictionary")
@@ -392,7 +393,14 @@ def save_test_suite_to_yaml(test_suite: TestSuite, path: Path) -> None:
         data["tests"].append(test_dict)
 
     with open(path, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        yaml.dump(
+            data,
+            f,
+            Dumper=SafeDumper,
+            allow_unicode=True,
+            default_flow_style=False,
+            sort_keys=False,
+        )
 
 
 class TestReporter:
@@ -5,6 +5,8 @@ Integration tests for all CLI commands using Typer's CliRunner.
 """
 
 import json
+import subprocess
+import sys
 import pytest
 from pathlib import Path
 
@@ -16,6 +18,32 @@ from prompt_vcs.manager import LOCKFILE_NAME, PROMPTS_DIR, PROMPTS_FILE
 runner = CliRunner()
 
 
+def test_cli_import_is_lazy():
+    """Importing the CLI must not load libcst, Jinja2 or Rich up front."""
+    code = (
+        "import sys, prompt_vcs.cli; "
+        "print(sorted(m for m in ('libcst', 'jinja2', 'rich') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_prompts_file_cache_tracks_changes(tmp_path):
+    """The cached prompts.yaml parse is reused until the file changes."""
+    from prompt_vcs.cli import _load_prompts_file_cached
+
+    prompts_file = tmp_path / PROMPTS_FILE
+    prompts_file.write_text('greeting: "Hello!"\n', encoding="utf-8")
+
+    first = _load_prompts_file_cached(prompts_file)
+    assert _load_prompts_file_cached(prompts_file) is first
+
+    prompts_file.write_text('greeting: "Hello!"\nfarewell: "Bye!"\n', encoding="utf-8")
+    assert set(_load_prompts_file_cached(prompts_file)) == {"greeting", "farewell"}
+
+
 class TestInitCommand:
     """Tests for 'pvcs init' command."""
     
@@ -109,6 +137,35 @@ greeting = p("user_greeting", "Hello {name}!")
         # Content should be unchanged
         assert prompts_file.read_text() == original_content
     
+    def test_scaffold_deduplicates_ids(self, project_with_prompts):
+        """Test that repeated identical prompts are scaffolded once."""
+        src_dir = project_with_prompts / "src"
+        (src_dir / "other.py").write_text(
+            'from prompt_vcs import p\n\ngreeting = p("user_greeting", "Hello {name}!")\n',
+            encoding="utf-8",
+        )
+        
+        result = runner.invoke(app, ["scaffold", str(src_dir)])
+        
+        assert result.exit_code == 0
+        assert "Added: 1 prompts" in result.output
+    
+    def test_scaffold_id_conflict(self, project_with_prompts):
+        """Test that scaffold fails on the same ID with different content."""
+        src_dir = project_with_prompts / "src"
+        prompts_file = project_with_prompts / PROMPTS_FILE
+        original_content = prompts_file.read_text()
+        (src_dir / "other.py").write_text(
+            'from prompt_vcs import p\n\ngreeting = p("user_greeting", "Hi there {name}!")\n',
+            encoding="utf-8",
+        )
+        
+        result = runner.invoke(app, ["scaffold", str(src_dir)])
+        
+        assert result.exit_code == 1
+        assert "user_greeting" in result.output
+        assert prompts_file.read_text() == original_content
+    
     def test_scaffold_nonexistent_directory(self, tmp_path):
         """Test scaffold with nonexistent directory fails gracefully."""
         result = runner.invoke(app, ["scaffold", str(tmp_path / "nonexistent")])
@@ -168,6 +225,18 @@ template: |
         
         assert result.exit_code == 1
         assert "not found" in result.output.lower()
+        assert "- v1" in result.output
+        assert "- v2" in result.output
+    
+    def test_switch_unknown_prompt_lists_none(self, project_with_versions):
+        """Test that switch reports no versions for an unknown prompt."""
+        result = runner.invoke(
+            app,
+            ["switch", "unknown", "v1", "--project", str(project_with_versions)]
+        )
+        
+        assert result.exit_code == 1
+        assert "(none)" in result.output
 
 
 class TestStatusCommand:
@@ -205,13 +274,54 @@ class TestStatusCommand:
         assert "summary" in result.output
         assert "v2" in result.output
         assert "v1" in result.output
+        assert "missing" not in result.output
+    
+    def test_status_reports_missing_versions(self, tmp_path):
+        """Test status flags locked versions without a YAML file."""
+        lockfile_path = tmp_path / LOCKFILE_NAME
+        lockfile_path.write_text('{"greeting": "v3", "summary": "v1"}', encoding="utf-8")
+        
+        prompt_dir = tmp_path / PROMPTS_DIR / "greeting"
+        prompt_dir.mkdir(parents=True)
+        (prompt_dir / "v1.yaml").write_text("template: test\n", encoding="utf-8")
+        
+        result = runner.invoke(app, ["status", "--project", str(tmp_path)])
+        
+        assert result.exit_code == 0
+        assert result.output.count("missing") == 2
+    
+    def test_status_nested_prompt_id(self, tmp_path):
+        """Test status finds versions of IDs that contain a path separator."""
+        lockfile_path = tmp_path / LOCKFILE_NAME
+        lockfile_path.write_text('{"chat/system": "v1", "chat/user": "v2"}', encoding="utf-8")
+        
+        prompt_dir = tmp_path / PROMPTS_DIR / "chat" / "system"
+        prompt_dir.mkdir(parents=True)
+        (prompt_dir / "v1.yaml").write_text("template: hi\n", encoding="utf-8")
+        
+        result = runner.invoke(app, ["status", "--project", str(tmp_path)])
+        
+        assert result.exit_code == 0
+        assert "chat/system" in result.output
+        assert result.output.count("missing") == 1
     
     def test_status_no_lockfile(self, tmp_path):
         """Test status when lockfile doesn't exist."""
         result = runner.invoke(app, ["status", "--project", str(tmp_path)])
-        
+
         assert result.exit_code == 1
 
+    def test_status_after_init_in_same_process(self, tmp_path, monkeypatch):
+        """Test status finds a project created by init earlier in the process."""
+        monkeypatch.chdir(tmp_path)
+
+        assert runner.invoke(app, ["status"]).exit_code == 1
+        assert runner.invoke(app, ["init"]).exit_code == 0
+
+        result = runner.invoke(app, ["status"])
+        assert result.exit_code == 0
+        assert "empty" in result.output.lower()
+
 
 class TestMigrateCommand:
     """Tests for 'pvcs migrate' command."""
@@ -277,7 +387,116 @@ prompt = f"Hello {user}, welcome to the application!"
         prompts_yaml = project_with_code / PROMPTS_FILE
         content = prompts_yaml.read_text()
         assert "app_prompt" in content
-    
+
+    def test_migrate_batch_none(self, project_with_code):
+        """Test that answering 'n' skips every candidate in the file."""
+        py_file = project_with_code / "app.py"
+        original = py_file.read_text()
+
+        result = runner.invoke(app, ["migrate", str(py_file)], input="n\n")
+
+        assert result.exit_code == 0
+        assert "Skipped: 1" in result.output
+        assert py_file.read_text() == original
+
+    def test_migrate_batch_select(self, project_with_code):
+        """Test that answering 's' falls back to per-candidate confirmation."""
+        py_file = project_with_code / "app.py"
+        py_file.write_text(
+            'prompt = "Summarize the following document carefully."\n'
+            'instruction = "Translate the following text into French."\n',
+            encoding="utf-8",
+        )
+
+        result = runner.invoke(app, ["migrate", str(py_file)], input="s\ny\nn\n")
+
+        assert result.exit_code == 0
+        content = py_file.read_text()
+        assert 'p("app_prompt"' in content
+        assert "Translate the following text" in content
+        assert 'p("app_instruction"' not in content
+
+    def test_migrate_directory_with_jobs(self, project_with_code):
+        """Test that migrate scans multiple files with worker processes."""
+        other_file = project_with_code / "other.py"
+        other_file.write_text(
+            'instruction = "Summarize the following document carefully."\n',
+            encoding="utf-8",
+        )
+
+        result = runner.invoke(
+            app,
+            ["migrate", str(project_with_code), "--yes", "--jobs", "2"]
+        )
+
+        assert result.exit_code == 0
+        assert "Total candidates: 2" in result.output
+        assert "from prompt_vcs import p" in (project_with_code / "app.py").read_text()
+        assert "from prompt_vcs import p" in other_file.read_text()
+
+    def test_migrate_jobs_spans_several_batches(self, tmp_path):
+        """Test that batched parallel scanning covers every file exactly once."""
+        for i in range(20):
+            (tmp_path / f"mod_{i:02d}.py").write_text(
+                f'prompt = "Describe item number {i} in detail please."\n',
+                encoding="utf-8",
+            )
+        (tmp_path / "plain.py").write_text("x = 1\n", encoding="utf-8")
+
+        result = runner.invoke(
+            app,
+            ["migrate", str(tmp_path), "--dry-run", "--jobs", "2"]
+        )
+
+        assert result.exit_code == 0
+        assert "Files scanned: 21" in result.output
+        assert "Total candidates: 20" in result.output
+
+    def test_migrate_skips_virtualenv_and_cache_dirs(self, tmp_path):
+        """Test that migrate does not descend into .venv, .git or __pycache__."""
+        source = 'prompt = "Summarize the following document carefully."\n'
+        (tmp_path / "app.py").write_text(source, encoding="utf-8")
+        for skipped in (".venv", ".git", "__pycache__"):
+            (tmp_path / skipped / "pkg").mkdir(parents=True)
+            (tmp_path / skipped / "pkg" / "mod.py").write_text(source, encoding="utf-8")
+
+        result = runner.invoke(app, ["migrate", str(tmp_path), "--dry-run"])
+
+        assert result.exit_code == 0
+        assert "Files scanned: 1" in result.output
+
+    def test_migrate_extra_pattern_not_prefiltered(self, tmp_path):
+        """Test that files matching only --pattern names are still scanned."""
+        py_file = tmp_path / "queries.py"
+        py_file.write_text(
+            'SQL_QUERY = "SELECT * FROM users WHERE active = 1"\n',
+            encoding="utf-8",
+        )
+
+        result = runner.invoke(
+            app,
+            ["migrate", str(py_file), "--dry-run", "--pattern", "sql"]
+        )
+
+        assert result.exit_code == 0
+        assert "Total candidates: 1" in result.output
+
+    def test_migrate_non_ascii_pattern_ignores_case(self, tmp_path):
+        """Test that non-ASCII --pattern names match regardless of case."""
+        py_file = tmp_path / "m.py"
+        py_file.write_text(
+            'ÄRGER_TEXT = "Das ist ein ziemlich langer Ärger-Text"\n',
+            encoding="utf-8",
+        )
+
+        result = runner.invoke(
+            app,
+            ["migrate", str(py_file), "--dry-run", "--pattern", "ärger"]
+        )
+
+        assert result.exit_code == 0
+        assert "Total candidates: 1" in result.output
+
     def test_migrate_nonexistent_path(self, tmp_path):
         """Test migrate with nonexistent path fails gracefully."""
         result = runner.invoke(
@@ -329,6 +548,66 @@ template: |
         # Should show some diff content
         assert "Hello" in result.output or "Dear" in result.output
     
+    def test_diff_large_versions(self, project_with_versions):
+        """Test that large version files are diffed (natively when git exists)."""
+        prompt_dir = project_with_versions / PROMPTS_DIR / "greeting"
+        body = "".join(f"  Line {i} of a long template.\n" for i in range(5000))
+        (prompt_dir / "v1.yaml").write_text(
+            "version: v1\ntemplate: |\n" + body, encoding="utf-8"
+        )
+        (prompt_dir / "v2.yaml").write_text(
+            "version: v2\ntemplate: |\n" + body.replace("Line 100 of", "Row 100 of"),
+            encoding="utf-8",
+        )
+
+        result = runner.invoke(
+            app,
+            ["diff", "greeting", "v1", "v2", "--project", str(project_with_versions)]
+        )
+
+        assert result.exit_code == 0
+        assert "prompts/greeting/v1.yaml" in result.output
+        assert "-  Line 100 of" in result.output
+        assert "+  Row 100 of" in result.output
+        assert "Line 150 of" not in result.output
+    
+    def test_git_diff_without_hunks_falls_back(self, tmp_path):
+        """Test the native diff defers to difflib when git reports no text hunks."""
+        from prompt_vcs.cli import _git_diff_files
+
+        path1 = tmp_path / "v1.yaml"
+        path2 = tmp_path / "v2.yaml"
+        path1.write_bytes(b"template: a\0b\n")
+        path2.write_bytes(b"template: a\0c\n")
+
+        assert _git_diff_files(path1, path2, "v1", "v2") is None
+        assert _git_diff_files(path1, path1, "v1", "v1") == []
+    
+    def test_git_diff_ignores_user_config(self, tmp_path, monkeypatch):
+        """Test the native diff prints difflib's output regardless of git config."""
+        import difflib
+        from prompt_vcs.cli import _git_diff_files
+
+        config = tmp_path / "gitconfig"
+        config.write_text(
+            "[diff]\n\tcontext = 10\n\talgorithm = histogram\n", encoding="utf-8"
+        )
+        monkeypatch.setenv("GIT_CONFIG_GLOBAL", str(config))
+
+        text1 = "template: |\n" + "".join(f"  Line {i}\n" for i in range(100))
+        text2 = text1.replace("Line 40\n", "Row 40\n")
+        path1 = tmp_path / "v1.yaml"
+        path2 = tmp_path / "v2.yaml"
+        path1.write_text(text1, encoding="utf-8")
+        path2.write_text(text2, encoding="utf-8")
+
+        assert _git_diff_files(path1, path2, "v1", "v2") == list(difflib.unified_diff(
+            text1.splitlines(keepends=True),
+            text2.splitlines(keepends=True),
+            fromfile="v1",
+            tofile="v2",
+        ))
+    
     def test_diff_identical_versions(self, project_with_versions):
         """Test diff with identical versions shows no differences."""
         result = runner.invoke(
@@ -426,6 +705,37 @@ class TestLogCommand:
         assert result.exit_code == 1
         assert "git" in result.output.lower()
     
+    def test_log_lists_commits(self, tmp_path):
+        """Test log lists only the commits touching prompts.yaml, newest first."""
+        def git(*args):
+            subprocess.run(
+                ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+                cwd=tmp_path, check=True, capture_output=True,
+            )
+
+        git("init", "-q")
+        (tmp_path / LOCKFILE_NAME).write_text('{}', encoding="utf-8")
+        prompts_file = tmp_path / PROMPTS_FILE
+        prompts_file.write_text('greeting: "Hello!"\n', encoding="utf-8")
+        git("add", ".")
+        git("commit", "-q", "-m", "Add greeting")
+        (tmp_path / "README").write_text("unrelated\n", encoding="utf-8")
+        git("add", ".")
+        git("commit", "-q", "-m", "Unrelated change")
+        prompts_file.write_text('greeting: "Hi!"\n', encoding="utf-8")
+        git("commit", "-q", "-am", "Shorten greeting")
+
+        result = runner.invoke(
+            app,
+            ["log", "greeting", "--project", str(tmp_path)]
+        )
+
+        assert result.exit_code == 0
+        assert "Shorten greeting" in result.output
+        assert "Add greeting" in result.output
+        assert "Unrelated change" not in result.output
+        assert result.output.index("Shorten greeting") < result.output.index("Add greeting")
+
     def test_log_prompt_not_found(self, tmp_path):
         """Test log fails when prompt doesn't exist."""
         # Create .git directory and lockfile
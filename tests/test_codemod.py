@@ -9,6 +9,7 @@ from prompt_vcs.codemod import (
     is_complex_expression,
     extract_fstring_parts,
     migrate_file_content,
+    plan_file_migration,
     MigrationCandidate,
 )
 import libcst as cst
@@ -41,6 +42,13 @@ class TestSanitizeVariableName:
         """Test complex access patterns."""
         assert sanitize_variable_name("user.data['score']") == "user_data_score"
 
+    def test_underscore_runs_and_leading_digit(self):
+        """Test underscore runs collapse and leading digits are guarded."""
+        assert sanitize_variable_name("__user__.name") == "user_name"
+        assert sanitize_variable_name("items[0][1]") == "items_0_1"
+        assert sanitize_variable_name("[0].x") == "_0_x"
+        assert sanitize_variable_name("()") == "arg"
+
 
 class TestIsComplexExpression:
     """Tests for complex expression detection."""
@@ -115,6 +123,16 @@ class TestExtractFstringParts:
         
         assert has_complex
 
+    def test_fstring_repeated_placeholder(self):
+        """Test that a repeated expression yields a single part."""
+        code = 'f"{name} and {name!r}, again {user.name}"'
+        fstring = cst.parse_expression(code)
+        template, parts, has_complex = extract_fstring_parts(fstring)
+
+        assert template == "{name} and {name!r}, again {user_name}"
+        assert [part.placeholder for part in parts] == ["name", "user_name"]
+        assert parts[0].format_spec == ""
+
 
 class TestMigrateFileContent:
     """Tests for file content migration."""
@@ -129,8 +147,34 @@ prompt = "Hello world, this is a test prompt"
         assert len(candidates) == 1
         assert candidates[0].variable_name == "prompt"
         assert "p(" in modified
+
+    def test_content_without_pattern_names_is_not_parsed(self, monkeypatch):
+        """Test content whose text matches no pattern skips the libcst parse."""
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("libcst should not be invoked")
+
+        monkeypatch.setattr(cst, "parse_module", fail_parse)
+        content = 'greeting = "Hello world, nothing to migrate here"\n'
+
+        assert migrate_file_content(content, "test.py", apply_changes=True) == (content, [])
+        assert plan_file_migration(content, "test.py").candidates == []
+        monkeypatch.undo()
+
+        modified, candidates = migrate_file_content(
+            content, "test.py", apply_changes=True, extra_patterns=["GREET"]
+        )
+        assert len(candidates) == 1
         assert "from prompt_vcs import p" in modified
-    
+
+    def test_prefilter_folds_case_like_the_migrator(self):
+        """Test upper-case and non-ASCII names still reach the migrator."""
+        content = 'SYSTEM_PROMPT = "You are a helpful assistant, always"\n'
+        assert len(migrate_file_content(content, "test.py")[1]) == 1
+
+        content = 'ÄRGER_TEXT = "Das ist ein ziemlich langer Text"\n'
+        candidates = migrate_file_content(content, "test.py", extra_patterns=["ärger"])[1]
+        assert len(candidates) == 1
+
     def test_fstring_migration(self):
         """Test migration of an f-string prompt."""
         content = '''
@@ -206,7 +250,28 @@ prompt = "Hello world, this is a test prompt"
         
         # 确保只出现一次 import，而不是两个
         assert modified.count("from prompt_vcs import p") == 1
-    
+
+    def test_import_merged_into_existing(self):
+        """Test that p joins an existing 'from prompt_vcs import ...'."""
+        content = '''"""Module docstring."""
+from prompt_vcs import get_manager
+
+prompt = "Hello world, this is a test prompt"
+'''
+        modified, candidates = migrate_file_content(content, "test.py", apply_changes=True)
+
+        assert "from prompt_vcs import p, get_manager" in modified
+        assert modified.count("from prompt_vcs import") == 1
+
+    def test_import_after_docstring(self):
+        """Test that the import goes after the docstring when there are no imports."""
+        content = '''"""Module docstring."""
+prompt = "Hello world, this is a test prompt"
+'''
+        modified, candidates = migrate_file_content(content, "test.py", apply_changes=True)
+
+        assert modified.startswith('"""Module docstring."""\nfrom prompt_vcs import p\n\nprompt = p(')
+
     def test_future_import_position(self):
         """Test that prompt_vcs import is added AFTER __future__ imports."""
         content = '''from __future__ import annotations
@@ -216,9 +281,9 @@ prompt = "Hello world, this is a test prompt"
 '''
         modified, candidates = migrate_file_content(content, "test.py", apply_changes=True)
         
-        lines = modified.strip().split('\n')
+        first_line = modified.lstrip().partition('\n')[0]
         # 确保第一行依然是 __future__，而不是 prompt_vcs
-        assert "from __future__" in lines[0]
+        assert first_line.startswith("from __future__")
         assert "from prompt_vcs import p" in modified
     
     def test_nested_scope_migration(self):
@@ -238,6 +303,49 @@ def get_greeting(name):
         assert "name=name" in modified
 
 
+class TestMigrationPlan:
+    """Tests for plan_file_migration / MigrationPlan.apply."""
+    
+    CONTENT = '''
+system_prompt = "You are a helpful assistant for everyone"
+user_msg = f"Please answer the question from {user}"
+'''
+    
+    def test_plan_does_not_modify(self):
+        """Test that planning only collects candidates."""
+        plan = plan_file_migration(self.CONTENT, "test.py")
+        
+        assert [c.prompt_id for c in plan.candidates] == ["test_system_prompt", "test_user_msg"]
+        assert plan.content == self.CONTENT
+    
+    def test_apply_matches_migrate_file_content(self):
+        """Test that applying a plan gives the same result as a fresh migration."""
+        plan = plan_file_migration(self.CONTENT, "test.py")
+        
+        expected = migrate_file_content(self.CONTENT, "test.py", apply_changes=True)
+        assert plan.apply() == expected
+    
+    def test_apply_only_approved(self):
+        """Test that only approved prompt IDs are applied."""
+        plan = plan_file_migration(self.CONTENT, "test.py")
+        
+        modified, applied = plan.apply({"test_user_msg"})
+        
+        assert [c.prompt_id for c in applied] == ["test_user_msg"]
+        assert 'system_prompt = "You are a helpful assistant for everyone"' in modified
+        assert 'p("test_user_msg"' in modified
+    
+    def test_plan_survives_pickling(self):
+        """Test that plans can be returned from worker processes."""
+        import pickle
+        
+        plan = pickle.loads(pickle.dumps(plan_file_migration(self.CONTENT, "test.py")))
+        
+        modified, applied = plan.apply()
+        assert len(applied) == 2
+        assert "from prompt_vcs import p" in modified
+
+
 class TestCleanModeMigration:
     """Tests for clean_mode migration."""
     
@@ -10,6 +10,7 @@ from prompt_vcs.extractor import (
     extract_prompts_from_file,
     extract_prompts_from_directory,
     check_id_conflicts,
+    collect_unique_prompts,
     PromptIdConflictError,
     ExtractedPrompt,
 )
@@ -140,3 +141,36 @@ class TestIdConflicts:
         
         # Should not raise
         check_id_conflicts(prompts)
+
+    def test_collect_unique_keeps_first_occurrence(self):
+        """Test that duplicates collapse onto the first location."""
+        prompts = [
+            ExtractedPrompt("a", "content A", "a.py", 1),
+            ExtractedPrompt("b", "content B", "b.py", 2),
+            ExtractedPrompt("a", "content A", "c.py", 3),
+        ]
+        
+        unique = collect_unique_prompts(prompts)
+        
+        assert list(unique) == ["a", "b"]
+        assert unique["a"].source_file == "a.py"
+    
+    def test_collect_unique_reports_every_location(self):
+        """Test that a conflict lists all locations of the conflicting ID."""
+        prompts = [
+            ExtractedPrompt("a", "content A", "a.py", 1),
+            ExtractedPrompt("b", "content B", "b.py", 1),
+            ExtractedPrompt("a", "content A", "c.py", 2),
+            ExtractedPrompt("b", "content X", "d.py", 3),
+            ExtractedPrompt("a", "content Z", "e.py", 4),
+        ]
+        
+        with pytest.raises(PromptIdConflictError) as exc_info:
+            collect_unique_prompts(iter(prompts))
+        
+        assert exc_info.value.prompt_id == "a"
+        assert exc_info.value.locations == [
+            ("a.py", 1, "content A"),
+            ("c.py", 2, "content A"),
+            ("e.py", 4, "content Z"),
+        ]
@@ -3,6 +3,7 @@ Tests for prompt_vcs.manager module.
 """
 
 import json
+import sys
 import pytest
 from pathlib import Path
 
@@ -11,8 +12,14 @@ from prompt_vcs.manager import (
     PromptDefinition,
     get_manager,
     reset_manager,
+    find_project,
+    find_project_root,
+    inspect_project,
+    read_lockfile,
+    write_lockfile,
     LOCKFILE_NAME,
     PROMPTS_DIR,
+    PROMPTS_FILE,
 )
 
 
@@ -63,7 +70,14 @@ class TestPromptManager:
         mgr.set_project_root(tmp_path)
         lockfile = mgr.load_lockfile()
         assert lockfile == {}
-    
+
+    def test_load_lockfile_invalid_json(self, tmp_path):
+        """Test that a malformed lockfile is treated as empty."""
+        (tmp_path / LOCKFILE_NAME).write_text("{not json", encoding="utf-8")
+        mgr = PromptManager()
+        mgr.set_project_root(tmp_path)
+        assert mgr.load_lockfile() == {}
+
     def test_get_prompt_from_lockfile(self, manager):
         """Test getting prompt that is locked to a version."""
         result = manager.get_prompt("greeting", "默认 {name}", name="测试")
@@ -74,6 +88,28 @@ class TestPromptManager:
         result = manager.get_prompt("unknown", "你好 {name}", name="世界")
         assert result == "你好 世界"
     
+    def test_get_prompt_reuses_parsed_version_file(self, manager, temp_project, monkeypatch):
+        """Test version files are parsed once and re-read only after they change."""
+        import prompt_vcs.manager as manager_module
+
+        calls = []
+        original = manager_module.load_yaml_template
+
+        def counting_load(path):
+            calls.append(path)
+            return original(path)
+
+        monkeypatch.setattr(manager_module, "load_yaml_template", counting_load)
+
+        assert "尊敬的 甲" in manager.get_prompt("greeting", None, name="甲")
+        assert "尊敬的 乙" in manager.get_prompt("greeting", None, name="乙")
+        assert len(calls) == 1
+
+        yaml_path = temp_project / PROMPTS_DIR / "greeting" / "v2.yaml"
+        yaml_path.write_text("template: 您好 {name}，欢迎回来\n", encoding="utf-8")
+        assert manager.get_prompt("greeting", None, name="丙") == "您好 丙，欢迎回来"
+        assert len(calls) == 2
+
     def test_register_prompt(self, manager):
         """Test registering a prompt definition."""
         definition = PromptDefinition(
@@ -97,6 +133,73 @@ class TestPromptManager:
         assert saved == {"new_prompt": "v1"}
 
 
+class TestLockfileIO:
+    """Tests for read_lockfile / write_lockfile helpers."""
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_round_trip(self, tmp_path, monkeypatch, use_orjson):
+        """Test both JSON backends produce the same indented, unescaped output."""
+        import prompt_vcs.manager as manager_module
+        
+        if use_orjson and not manager_module.HAS_ORJSON:
+            pytest.skip("orjson not installed")
+        monkeypatch.setattr(manager_module, "HAS_ORJSON", use_orjson)
+        
+        lockfile_path = tmp_path / LOCKFILE_NAME
+        write_lockfile(lockfile_path, {"greeting": "v2", "问候": "v1"})
+        
+        assert lockfile_path.read_text(encoding="utf-8") == (
+            '{\n  "greeting": "v2",\n  "问候": "v1"\n}'
+        )
+        assert read_lockfile(lockfile_path) == {"greeting": "v2", "问候": "v1"}
+    
+    def test_write_is_atomic(self, tmp_path, monkeypatch):
+        """Test that a failed write leaves the old lockfile and no temp file."""
+        import os
+        
+        lockfile_path = tmp_path / LOCKFILE_NAME
+        write_lockfile(lockfile_path, {"greeting": "v1"})
+        assert sorted(p.name for p in tmp_path.iterdir()) == [LOCKFILE_NAME]
+        
+        def failing_replace(src, dst):
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(os, "replace", failing_replace)
+        with pytest.raises(OSError):
+            write_lockfile(lockfile_path, {"greeting": "v2"})
+        
+        assert read_lockfile(lockfile_path) == {"greeting": "v1"}
+        assert sorted(p.name for p in tmp_path.iterdir()) == [LOCKFILE_NAME]
+    
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    def test_write_keeps_mode(self, tmp_path):
+        """Test that rewriting a lockfile keeps its permissions."""
+        lockfile_path = tmp_path / LOCKFILE_NAME
+        write_lockfile(lockfile_path, {"greeting": "v1"})
+        lockfile_path.chmod(0o600)
+        
+        write_lockfile(lockfile_path, {"greeting": "v2"})
+        
+        assert lockfile_path.stat().st_mode & 0o777 == 0o600
+        assert read_lockfile(lockfile_path) == {"greeting": "v2"}
+    
+    @pytest.mark.skipif(sys.platform == "win32", reason="symlinks need privileges")
+    def test_write_through_symlink(self, tmp_path):
+        """Test that a symlinked lockfile stays a link to the updated target."""
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        target = shared / "lock.json"
+        write_lockfile(target, {"greeting": "v1"})
+        lockfile_path = tmp_path / LOCKFILE_NAME
+        lockfile_path.symlink_to(target)
+        
+        write_lockfile(lockfile_path, {"greeting": "v2"})
+        
+        assert lockfile_path.is_symlink()
+        assert read_lockfile(target) == {"greeting": "v2"}
+        assert sorted(p.name for p in shared.iterdir()) == ["lock.json"]
+
+
 class TestFindProjectRoot:
     """Tests for project root discovery."""
     
@@ -124,6 +227,18 @@ class TestFindProjectRoot:
         
         assert root == tmp_path
     
+    def test_method_rescans_each_call(self, tmp_path):
+        """Test the manager method sees a lockfile created after a lookup."""
+        subdir = tmp_path / "src"
+        subdir.mkdir()
+        (subdir / ".git").mkdir()
+        mgr = PromptManager()
+        
+        assert mgr.find_project_root(subdir) == subdir
+        (subdir / ".git").rmdir()
+        (tmp_path / LOCKFILE_NAME).write_text("{}", encoding="utf-8")
+        assert mgr.find_project_root(subdir) == tmp_path
+    
     def test_not_found(self, tmp_path):
         """Test when no project root is found."""
         isolated = tmp_path / "isolated"
@@ -136,6 +251,68 @@ class TestFindProjectRoot:
         # Root might be None or some parent with .git
         # The key is it doesn't infinite loop
 
+    def test_module_helper_respects_markers(self, temp_project):
+        """Test the find_project_root helper with custom markers."""
+        subdir = temp_project / "src"
+        subdir.mkdir()
+        (subdir / ".git").mkdir()
+        
+        assert find_project_root(subdir) == subdir
+        assert find_project_root(subdir, (LOCKFILE_NAME,)) == temp_project
+    
+    def test_module_helper_sees_new_lockfile(self, tmp_path):
+        """Test that a miss is not remembered once a lockfile appears."""
+        subdir = tmp_path / "src"
+        subdir.mkdir()
+        
+        before = find_project_root(subdir, (LOCKFILE_NAME,))
+        assert before != tmp_path
+        
+        (tmp_path / LOCKFILE_NAME).write_text("{}", encoding="utf-8")
+        assert find_project_root(subdir, (LOCKFILE_NAME,)) == tmp_path
+    
+    def test_module_helper_follows_chdir(self, tmp_path, monkeypatch):
+        """Test that relative start paths resolve against the current directory."""
+        first = tmp_path / "first"
+        second = tmp_path / "second"
+        for project in (first, second):
+            project.mkdir()
+            (project / LOCKFILE_NAME).write_text("{}", encoding="utf-8")
+        
+        monkeypatch.chdir(first)
+        assert find_project_root(Path(".")) == first
+        monkeypatch.chdir(second)
+        assert find_project_root(Path(".")) == second
+    
+    def test_find_project_reports_root_entries(self, tmp_path):
+        """Test that the root lookup records .git, lockfile and prompts.yaml."""
+        (tmp_path / ".git").mkdir()
+        (tmp_path / PROMPTS_FILE).write_text("", encoding="utf-8")
+        subdir = tmp_path / "src"
+        subdir.mkdir()
+        
+        info = find_project(subdir)
+        
+        assert info.root == tmp_path
+        assert info.has_git
+        assert not info.has_lockfile
+        assert info.has_prompts_file
+        assert inspect_project(tmp_path) == info
+    
+    def test_find_project_flags_track_new_entries(self, tmp_path):
+        """Test that prompts.yaml and .git created after a lookup are reported."""
+        (tmp_path / LOCKFILE_NAME).write_text("{}", encoding="utf-8")
+        
+        info = find_project(tmp_path)
+        assert not info.has_git
+        assert not info.has_prompts_file
+        
+        (tmp_path / ".git").mkdir()
+        (tmp_path / PROMPTS_FILE).write_text("", encoding="utf-8")
+        info = find_project(tmp_path)
+        assert info.has_git
+        assert info.has_prompts_file
+
 
 class TestSingleFileMode:
     """Tests for single-file mode (prompts.yaml)."""
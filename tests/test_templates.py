@@ -2,11 +2,19 @@
 Tests for prompt_vcs.templates module - single file mode functions.
 """
 
+import os
 from pathlib import Path
+import sys
 import pytest
 import yaml
 
-from prompt_vcs.templates import load_prompts_file, save_prompts_file, render_template
+from prompt_vcs.templates import (
+    create_yaml_template,
+    load_prompts_file,
+    load_yaml_template,
+    render_template,
+    save_prompts_file,
+)
 
 
 class TestLoadPromptsFile:
@@ -41,6 +49,30 @@ summary:
         
         result = load_prompts_file(prompts_file)
         assert result == {}
+
+    def test_load_large_file(self, tmp_path):
+        """Test loading a prompts.yaml large enough to be memory-mapped."""
+        prompts_file = tmp_path / "prompts.yaml"
+        lines = [f"prompt_{i}: \"Héllo number {i}\"" for i in range(500)]
+        prompts_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        assert prompts_file.stat().st_size > 4096
+
+        result = load_prompts_file(prompts_file)
+        assert len(result) == 500
+        assert result["prompt_499"]["template"] == "Héllo number 499"
+
+    @pytest.mark.parametrize("padding", [0, 5000])
+    def test_parse_error_names_file(self, tmp_path, padding):
+        """Test YAML errors point at the file for small and memory-mapped files."""
+        prompts_file = tmp_path / "prompts.yaml"
+        prompts_file.write_text(
+            "#" * padding + "\ngreeting: [unclosed\n", encoding="utf-8"
+        )
+        
+        with pytest.raises(yaml.YAMLError) as exc_info:
+            load_prompts_file(prompts_file)
+        
+        assert f'in "{prompts_file}"' in str(exc_info.value)
     
     def test_load_file_not_found(self, tmp_path):
         """Test loading non-existent file raises error."""
@@ -166,6 +198,77 @@ class TestSavePromptsFile:
         }
 
 
+class TestCreateYamlTemplate:
+    """Tests for create_yaml_template function."""
+
+    def test_create_new_file(self, tmp_path):
+        """Test that a missing template file is created with parents."""
+        yaml_path = tmp_path / "prompts" / "greeting" / "v1.yaml"
+
+        assert create_yaml_template(yaml_path, "你好 {name}", description="Greeting")
+
+        data = load_yaml_template(yaml_path)
+        assert data == {"version": "v1", "description": "Greeting", "template": "你好 {name}"}
+
+    def test_existing_file_untouched(self, tmp_path):
+        """Test that an existing template file is not overwritten."""
+        yaml_path = tmp_path / "v1.yaml"
+        yaml_path.write_text("template: original\n", encoding="utf-8")
+
+        assert not create_yaml_template(yaml_path, "replacement")
+        assert yaml_path.read_text(encoding="utf-8") == "template: original\n"
+
+    def test_serialization_error_creates_nothing(self, tmp_path, monkeypatch):
+        """Test that a failing dump leaves no empty file behind."""
+        import prompt_vcs.templates as templates
+
+        def fail(*args, **kwargs):
+            raise yaml.YAMLError("boom")
+
+        monkeypatch.setattr(templates, "dump_yaml_template", fail)
+        yaml_path = tmp_path / "v1.yaml"
+
+        with pytest.raises(yaml.YAMLError):
+            create_yaml_template(yaml_path, "Hello")
+        assert not yaml_path.exists()
+
+    def test_failed_write_removes_file(self, tmp_path, monkeypatch):
+        """Test that a write error does not leave a truncated template."""
+        import prompt_vcs.templates as templates
+
+        class FailingFile:
+            def __init__(self, fd, mode):
+                os.close(fd)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def write(self, data):
+                raise OSError("disk full")
+
+        monkeypatch.setattr(templates.os, "fdopen", FailingFile)
+        yaml_path = tmp_path / "v1.yaml"
+
+        with pytest.raises(OSError, match="disk full"):
+            create_yaml_template(yaml_path, "Hello")
+        assert not yaml_path.exists()
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    def test_mode_follows_umask(self, tmp_path):
+        """Test that the new file gets the usual umask-governed permissions."""
+        old_umask = os.umask(0o002)
+        try:
+            yaml_path = tmp_path / "v1.yaml"
+            assert create_yaml_template(yaml_path, "Hello")
+        finally:
+            os.umask(old_umask)
+
+        assert yaml_path.stat().st_mode & 0o777 == 0o664
+
+
 class TestRenderTemplate:
     """Tests for render_template."""
 